@@ -13,7 +13,8 @@ from ..config import settings
 from ..core.entities import User
 from ..core.services import (AuthService, EmailService, ImageService,
                              PosterService)
-from ..infrastructure.database import AsyncSession, get_db_session
+from ..infrastructure.database import (AsyncSession, get_db_session,
+                                       unit_of_work)
 from ..infrastructure.repositories import (LocalFileStorage,
                                            PostgreSQLArchivedPosterRepository,
                                            PostgreSQLImageRepository,
@@ -145,14 +146,18 @@ async def get_poster_service(
     archived_repo: PostgreSQLArchivedPosterRepository = Depends(
         get_archived_poster_repository
     ),
+    image_repo: PostgreSQLImageRepository = Depends(get_image_repository),
     file_storage: LocalFileStorage = Depends(get_file_storage),
+    session: AsyncSession = Depends(get_db_session),
 ) -> PosterService:
     """Get poster service instance with PostgreSQL repositories"""
     return PosterService(
         poster_repo=poster_repo,
         archived_repo=archived_repo,
+        image_repo=image_repo,
         file_storage=file_storage,
         upload_dir="uploads",
+        transaction=lambda: unit_of_work(session),
     )
 
 
@@ -180,6 +180,8 @@ async def refresh_token(
         )
 
     try:
+        # Rotation is a single statement, and an expired token's delete
+        # must commit even though the refresh is then rejected
         token_data = await auth_service.refresh_access_token(refresh_token)
         # Convert expires_at datetime to expires_in seconds
         expires_in = int(
@@ -5,13 +5,14 @@ Handles image upload, retrieval, and deletion
 
 from typing import List
 
-from fastapi import (APIRouter, Depends, File, HTTPException, Security,
+from fastapi import (APIRouter, Depends, File, HTTPException, Query, Security,
                      UploadFile)
+from fastapi.responses import StreamingResponse
 
 from ...core.entities import ImageInfo, User
 from ...core.services import ImageService
 from ..dependencies import get_current_user, get_image_service
-from .utils import to_public_path
+from .utils import iter_ndjson, iter_upload_file, to_public_path
 
 router = APIRouter()
 
@@ -82,12 +83,15 @@ async def upload_image(
     **Maximum file size**: 10MB
     """
     try:
-        # Read file content
-        file_content = await file.read()
-        # Upload image
+        # Reject early when the client-declared size is already too large
+        if file.size is not None and file.size > image_service.max_file_size:
+            raise ValueError(
+                f"File size exceeds maximum of {image_service.max_file_size} bytes"
+            )
+        # Upload image (streamed, size enforced while reading)
         image = await image_service.upload_image(
             username=current_user.username,
-            file_content=file_content,
+            file_chunks=iter_upload_file(file),
             content_type=file.content_type or "application/octet-stream",
             original_filename=file.filename or "unknown",
         )
@@ -123,6 +127,9 @@ async def upload_image(
     - Only returns images owned by the authenticated user
     - No access to other users' images
     - Empty list if no images uploaded
+    ## Streaming
+    Pass `stream=true` to receive `application/x-ndjson` (one image per line),
+    streamed from the database cursor instead of buffered.
     """,
     responses={
         200: {
@@ -152,6 +159,7 @@ async def upload_image(
     dependencies=[Security(get_current_user)],
 )
 async def get_images(
+    stream: bool = Query(False, description="Stream the list as NDJSON"),
     current_user: User = Depends(get_current_user),
     image_service: ImageService = Depends(get_image_service),
 ):
@@ -160,12 +168,14 @@ async def get_images(
     Returns a list of image metadata for all images owned by the authenticated user.
     The actual image files can be accessed via the `/uploads/{filename}` endpoint.
     """
+    if stream:
+        return StreamingResponse(
+            iter_ndjson(image_service.iter_user_images(current_user.username)),
+            media_type="application/x-ndjson",
+        )
     try:
-        images = await image_service.get_user_images(current_user.username)
-        # Ensure file_path is public
-        for img in images:
-            img["file_path"] = to_public_path(img.get("file_path", ""))
-        return images
+        # file_path is already converted to a public /uploads/ path
+        return await image_service.get_user_images(current_user.username)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error retrieving images: {str(e)}"
@@ -3,28 +3,47 @@ Poster management routes
 Handles poster CRUD operations, trash, and archive functionality
 """
 
-import os
-import shutil
-from typing import List
+from collections import defaultdict
+from typing import Dict, List
 
 from fastapi import (APIRouter, Depends, File, Form, HTTPException, Path,
                      Request, Security, UploadFile)
 from fastapi.security.utils import get_authorization_scheme_param
-from sqlalchemy import desc, or_, select
+from sqlalchemy import delete, desc, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...core.entities import ArchivedPoster, Poster, User
-from ...core.services import AuthService
-from ...infrastructure.database import get_db_session
+from ...core.services import AuthService, invalidate_user_images
+from ...infrastructure.database import get_db_session, unit_of_work
 from ...infrastructure.models import ImageModel, PosterModel
 from ...infrastructure.notifier import post_notifier
+from ...infrastructure.repositories import LocalFileStorage
 from ..dependencies import (get_auth_service, get_current_user,
-                            get_poster_service)
-from .utils import to_public_path
+                            get_file_storage, get_poster_service)
+from .utils import iter_upload_file, to_public_path
 
 router = APIRouter()
 
 
+async def _images_by_poster(
+    db: AsyncSession, poster_ids: List[int]
+) -> Dict[int, List[dict]]:
+    """Load the public image entries for many posters in one query"""
+    images: Dict[int, List[dict]] = defaultdict(list)
+    if not poster_ids:
+        return images
+    result = await db.execute(
+        select(ImageModel.poster_id, ImageModel.filename, ImageModel.file_path).where(
+            ImageModel.poster_id.in_(poster_ids)
+        )
+    )
+    for poster_id, filename, file_path in result:
+        images[poster_id].append(
+            {"filename": filename, "file_path": to_public_path(file_path)}
+        )
+    return images
+
+
 @router.post(
     "/posters/",
     response_model=Poster,
@@ -40,43 +59,57 @@ async def create_poster(
     ),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session),
+    file_storage: LocalFileStorage = Depends(get_file_storage),
 ):
     """Create a new poster with image and message."""
-    # Create PosterModel
-    poster = PosterModel(
-        username=current_user.username,
-        message=message,
-        privacy=privacy,
-    )
-    db.add(poster)
-    await db.commit()
-    await db.refresh(poster)
-
-    # Save images and create ImageModel for each
-    upload_dir = "uploads"
-    os.makedirs(upload_dir, exist_ok=True)
-    image_models = []
-    for image in images:
-        image_filename = f"{current_user.username}_{image.filename}"
-        image_path = os.path.join(upload_dir, image_filename)
-        with open(image_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-
-        image_model = ImageModel(
-            filename=image_filename,
-            original_filename=image.filename,
+    # Loading the user may have opened a read transaction; end it so no
+    # connection is held while the uploads stream to disk
+    if db.in_transaction():
+        await db.commit()
+
+    saved = []
+    try:
+        for image in images:
+            image_filename = f"{current_user.username}_{image.filename}"
+            image_path = await file_storage.save_file(
+                iter_upload_file(image), image_filename
+            )
+            saved.append((image, image_filename, image_path))
+
+        # Create PosterModel
+        poster = PosterModel(
             username=current_user.username,
-            file_path=image_path,
-            file_size=image.size,
-            content_type=image.content_type or "application/octet-stream",
-            poster_id=poster.id,
+            message=message,
+            privacy=privacy,
         )
-        image_models.append(image_model)
+        db.add(poster)
+        # Flush for the id (and created_at, via eager_defaults); the poster and
+        # its images commit together below
+        await db.flush()
+
+        image_models = [
+            ImageModel(
+                filename=image_filename,
+                original_filename=image.filename,
+                username=current_user.username,
+                file_path=image_path,
+                file_size=image.size,
+                content_type=image.content_type or "application/octet-stream",
+                poster_id=poster.id,
+            )
+            for image, image_filename, image_path in saved
+        ]
 
-    db.add_all(image_models)
-    await db.commit()
+        db.add_all(image_models)
+        await db.commit()
+    except BaseException:
+        # Nothing references the files unless the rows committed
+        for _, _, image_path in saved:
+            await file_storage.delete_file(image_path)
+        raise
+    invalidate_user_images(current_user.username)
 
-    poster_obj = Poster.from_orm(poster)
+    poster_obj = Poster.model_validate(poster)
     poster_obj.images = [
         {
             "filename": img.filename,
@@ -92,7 +125,7 @@ async def create_poster(
         except Exception:
             pass
 
-    return poster_obj.dict()
+    return poster_obj.model_dump()
 
 
 @router.get(
@@ -166,21 +199,15 @@ async def get_posters(
     result = await db.execute(stmt)
     posters = result.scalars().all()
 
+    # Associated images for the whole page in one query
+    images = await _images_by_poster(db, [p.id for p in posters])
     poster_objs = []
     for p in posters:
-        # Get associated images
-        images_result = await db.execute(
-            select(ImageModel).where(ImageModel.poster_id == p.id)
-        )
-        images = images_result.scalars().all()
-        poster_obj = Poster.from_orm(p)
-        poster_obj.images = [
-            {"filename": img.filename, "file_path": to_public_path(img.file_path)}
-            for img in images
-        ]
+        poster_obj = Poster.model_validate(p)
+        poster_obj.images = images.get(p.id, [])
         poster_objs.append(poster_obj)
 
-    return [po.dict() for po in poster_objs]
+    return [po.model_dump() for po in poster_objs]
 
 
 @router.patch(
@@ -202,6 +229,7 @@ async def edit_poster(
     current_user: User = Depends(get_current_user),
     poster_service=Depends(get_poster_service),
     db: AsyncSession = Depends(get_db_session),
+    file_storage: LocalFileStorage = Depends(get_file_storage),
 ):
     """Edit an existing poster."""
     image_updates = []
@@ -218,52 +246,57 @@ async def edit_poster(
             )
 
     try:
-        poster = await poster_service.edit_poster(
-            poster_id=poster_id,
-            username=current_user.username,
-            message=message,
-            image_updates=image_updates,
-            privacy=privacy,
-        )
-
-        # Handle image update if provided
-        if image_updates:
-            # Delete old images for this poster
-            old_images_result = await db.execute(
-                select(ImageModel).where(ImageModel.poster_id == poster_id)
+        # The poster update and image replacement commit as one transaction
+        async with unit_of_work(db):
+            poster = await poster_service.edit_poster(
+                poster_id=poster_id,
+                username=current_user.username,
+                message=message,
+                image_updates=image_updates,
+                privacy=privacy,
             )
-            old_images = old_images_result.scalars().all()
-            for old_img in old_images:
-                # Delete file from storage
-                if os.path.exists(old_img.file_path):
-                    os.remove(old_img.file_path)
-                # Delete from database
-                await db.delete(old_img)
-
-            # Create new images
-            upload_dir = "uploads"
-            os.makedirs(upload_dir, exist_ok=True)
-            for update in image_updates:
-                new_image_filename = f"{current_user.username}_{update['filename']}"
-                new_image_path = os.path.join(upload_dir, new_image_filename)
-                with open(new_image_path, "wb") as buffer:
-                    buffer.write(update["content"])
-
-                # Create new ImageModel
-                new_image_model = ImageModel(
-                    filename=new_image_filename,
-                    original_filename=update["filename"],
-                    username=current_user.username,
-                    file_path=new_image_path,
-                    file_size=len(update["content"]),
-                    content_type=update["content_type"],
-                    poster_id=poster_id,
+
+            # Handle image update if provided
+            old_paths, new_paths = [], set()
+            if image_updates:
+                # Delete old image rows; their files go after the commit
+                old_images_result = await db.execute(
+                    delete(ImageModel)
+                    .where(ImageModel.poster_id == poster_id)
+                    .returning(ImageModel.file_path)
                 )
-                db.add(new_image_model)
-            await db.commit()
+                old_paths = old_images_result.scalars().all()
+
+                # Create new images
+                for update in image_updates:
+                    new_image_filename = f"{current_user.username}_{update['filename']}"
+                    new_image_path = await file_storage.save_file(
+                        update["content"], new_image_filename
+                    )
+                    new_paths.add(new_image_path)
+
+                    # Create new ImageModel
+                    new_image_model = ImageModel(
+                        filename=new_image_filename,
+                        original_filename=update["filename"],
+                        username=current_user.username,
+                        file_path=new_image_path,
+                        file_size=len(update["content"]),
+                        content_type=update["content_type"],
+                        poster_id=poster_id,
+                    )
+                    db.add(new_image_model)
+
+        # Old files are removed once the swap has committed, except those the
+        # new images were just written over
+        await poster_service.delete_image_files(
+            [path for path in old_paths if path not in new_paths]
+        )
+        if image_updates:
+            invalidate_user_images(current_user.username)
 
         # Get updated poster with images
-        poster_obj = Poster.from_orm(poster)
+        poster_obj = Poster.model_validate(poster)
         images_result = await db.execute(
             select(ImageModel).where(ImageModel.poster_id == poster.id)
         )
@@ -272,7 +305,7 @@ async def edit_poster(
             {"filename": img.filename, "file_path": to_public_path(img.file_path)}
             for img in images
         ]
-        return poster_obj.dict()
+        return poster_obj.model_dump()
     except ValueError as e:
         raise HTTPException(
             status_code=403 if "not allowed" in str(e).lower() else 404, detail=str(e)
@@ -293,19 +326,21 @@ async def delete_poster(
 ):
     """Delete a poster (soft delete)."""
     try:
-        # Delete associated images first
-        images_result = await db.execute(
-            select(ImageModel).where(ImageModel.poster_id == poster_id)
-        )
-        images = images_result.scalars().all()
-        for img in images:
-            # Delete file from storage
-            if os.path.exists(img.file_path):
-                os.remove(img.file_path)
-            # Delete from database
-            await db.delete(img)
-
-        await poster_service.delete_poster(poster_id, current_user.username)
+        # Image rows and the soft delete commit as one transaction
+        async with unit_of_work(db):
+            # Ownership is checked before anything is removed
+            await poster_service.delete_poster(poster_id, current_user.username)
+
+            # Delete associated image rows; their files go after the commit
+            images_result = await db.execute(
+                delete(ImageModel)
+                .where(ImageModel.poster_id == poster_id)
+                .returning(ImageModel.file_path)
+            )
+            file_paths = images_result.scalars().all()
+
+        await poster_service.delete_image_files(file_paths)
+        invalidate_user_images(current_user.username)
         return {"message": "Poster deleted successfully"}
     except ValueError as e:
         raise HTTPException(
@@ -332,19 +367,13 @@ async def get_deleted_posters(
     """Get all deleted (trashed) posters for the current user."""
     deleted = await poster_service.get_deleted_posts(current_user.username)
 
-    # Add images to each poster
+    # Add images to each poster, loaded for all of them in one query
+    images = await _images_by_poster(db, [poster.id for poster in deleted])
     result = []
     for poster in deleted:
-        poster_obj = Poster.from_orm(poster)
-        images_result = await db.execute(
-            select(ImageModel).where(ImageModel.poster_id == poster.id)
-        )
-        images = images_result.scalars().all()
-        poster_obj.images = [
-            {"filename": img.filename, "file_path": to_public_path(img.file_path)}
-            for img in images
-        ]
-        result.append(poster_obj.dict())
+        poster_obj = Poster.model_validate(poster)
+        poster_obj.images = images.get(poster.id, [])
+        result.append(poster_obj.model_dump())
 
     return result
 
@@ -362,26 +391,11 @@ async def get_deleted_posters(
 async def hard_delete_all_deleted_posters(
     current_user: User = Depends(get_current_user),
     poster_service=Depends(get_poster_service),
-    db: AsyncSession = Depends(get_db_session),
 ):
     """Permanently delete all posts from the trash (hard delete)."""
-    # Get all deleted posters for this user
-    deleted_posters = await poster_service.get_deleted_posts(current_user.username)
-
-    # Delete associated images first
-    for poster in deleted_posters:
-        images_result = await db.execute(
-            select(ImageModel).where(ImageModel.poster_id == poster.id)
-        )
-        images = images_result.scalars().all()
-        for img in images:
-            # Delete file from storage
-            if os.path.exists(img.file_path):
-                os.remove(img.file_path)
-            # Delete from database
-            await db.delete(img)
-
+    # Archives the posters and removes their images (rows and files)
     count = await poster_service.hard_delete_all_deleted(current_user.username)
+    invalidate_user_images(current_user.username)
     return {"message": f"{count} deleted posters permanently removed"}
 
 
@@ -470,7 +484,7 @@ async def get_poster_detail(
                     status_code=451, detail="Not allowed to view this poster (private)"
                 )
 
-    poster_obj = Poster.from_orm(poster)
+    poster_obj = Poster.model_validate(poster)
     # Get associated images
     images_result = await db.execute(
         select(ImageModel).where(ImageModel.poster_id == poster.id)
@@ -480,7 +494,7 @@ async def get_poster_detail(
         {"filename": img.filename, "file_path": to_public_path(img.file_path)}
         for img in images
     ]
-    return poster_obj.dict()
+    return poster_obj.model_dump()
 
 
 @router.delete(
@@ -500,25 +514,14 @@ async def hard_delete_single_deleted_poster(
     poster_id: int,
     current_user: User = Depends(get_current_user),
     poster_service=Depends(get_poster_service),
-    db: AsyncSession = Depends(get_db_session),
 ):
     """Permanently delete a single poster from trash."""
     try:
-        # Delete associated images first
-        images_result = await db.execute(
-            select(ImageModel).where(ImageModel.poster_id == poster_id)
-        )
-        images = images_result.scalars().all()
-        for img in images:
-            # Delete file from storage
-            if os.path.exists(img.file_path):
-                os.remove(img.file_path)
-            # Delete from database
-            await db.delete(img)
-
+        # Archives the poster and removes its images (rows and files)
         archived = await poster_service.hard_delete_post(
             poster_id, current_user.username
         )
+        invalidate_user_images(current_user.username)
         return archived
     except ValueError as e:
         raise HTTPException(
@@ -548,7 +551,7 @@ async def restore_deleted_poster(
     try:
         poster = await poster_service.restore_post(poster_id, current_user.username)
         # Get restored poster with images
-        poster_obj = Poster.from_orm(poster)
+        poster_obj = Poster.model_validate(poster)
         images_result = await db.execute(
             select(ImageModel).where(ImageModel.poster_id == poster.id)
         )
@@ -557,7 +560,7 @@ async def restore_deleted_poster(
             {"filename": img.filename, "file_path": to_public_path(img.file_path)}
             for img in images
         ]
-        return poster_obj.dict()
+        return poster_obj.model_dump()
     except ValueError as e:
         raise HTTPException(
             status_code=403 if "not allowed" in str(e).lower() else 404, detail=str(e)
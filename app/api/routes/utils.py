@@ -3,6 +3,15 @@ Utility functions for API routes
 """
 
 import os
+from typing import Any, AsyncIterator
+
+import orjson
+from fastapi import UploadFile
+
+# Read uploads in 64 KiB chunks so size limits apply before buffering
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+_NDJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_APPEND_NEWLINE
 
 
 def public_image_path(image_path):
@@ -21,3 +30,17 @@ def to_public_path(fp):
     if fp.startswith("uploads/"):
         return "/" + fp
     return "/uploads/" + os.path.basename(fp)
+
+
+async def iter_upload_file(
+    upload: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """Yield the body of an uploaded file chunk by chunk"""
+    while chunk := await upload.read(chunk_size):
+        yield chunk
+
+
+async def iter_ndjson(items: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+    """Encode an async stream of JSON-able items as newline-delimited JSON"""
+    async for item in items:
+        yield orjson.dumps(item, option=_NDJSON_OPTIONS)
@@ -18,6 +18,45 @@ class Settings(BaseModel):
         ),
         description="Database connection URL",
     )
+    DB_POOL_SIZE: int = Field(
+        default=int(os.getenv("DB_POOL_SIZE", "20")),
+        description="Persistent connections kept in the pool",
+        ge=1,
+        validate_default=True,
+    )
+    DB_MAX_OVERFLOW: int = Field(
+        default=int(os.getenv("DB_MAX_OVERFLOW", "40")),
+        description="Extra connections allowed above the pool size under load",
+        ge=0,
+        validate_default=True,
+    )
+    DB_POOL_TIMEOUT: int = Field(
+        default=int(os.getenv("DB_POOL_TIMEOUT", "10")),
+        description="Seconds to wait for a free connection before failing",
+        gt=0,
+        validate_default=True,
+    )
+    DB_POOL_RECYCLE: int = Field(
+        default=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        description="Seconds after which a connection is replaced",
+        gt=0,
+        # Stay under typical load-balancer/NAT idle timeouts
+        le=3600,
+        validate_default=True,
+    )
+    DB_POOL_PRE_PING: bool = Field(
+        default=os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+        description="Test connections on checkout; disable behind PgBouncer",
+    )
+    DB_STATEMENT_CACHE_SIZE: int = Field(
+        default=int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500")),
+        description=(
+            "Prepared statements cached per asyncpg connection; "
+            "must be 0 behind PgBouncer in transaction pooling"
+        ),
+        ge=0,
+        validate_default=True,
+    )
 
     # Security
     SECRET_KEY: str = Field(
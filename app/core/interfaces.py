@@ -4,7 +4,7 @@ Repository interfaces - Abstract base classes for data access
 
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
 
 from .entities import ArchivedPoster, Image, User, UserStatus
 
@@ -16,6 +16,10 @@ class UserRepository(ABC):
     async def create(self, user: User) -> User:
         """Create a new user"""
 
+    @abstractmethod
+    async def create_if_absent(self, user: User) -> Optional[User]:
+        """Create a user unless the username or email is taken, else None"""
+
     @abstractmethod
     async def get_by_username(self, username: str) -> Optional[User]:
         """Get user by username"""
@@ -26,7 +30,7 @@ class UserRepository(ABC):
 
     @abstractmethod
     async def get_by_status(self, status: UserStatus) -> List[User]:
-        """Get users by status (pending, approved, rejected)"""
+        """Get users by status (pending, approved, rejected), oldest first"""
 
     @abstractmethod
     async def update(self, user: User) -> User:
@@ -48,14 +52,26 @@ class ImageRepository(ABC):
     async def get_by_filename(self, filename: str) -> Optional[Image]:
         """Get image by filename"""
 
+    @abstractmethod
+    async def exists(self, filename: str) -> bool:
+        """Check whether an image with this filename exists"""
+
     @abstractmethod
     async def get_by_username(self, username: str) -> List[Image]:
-        """Get all images for a user"""
+        """Get all images for a user, newest first (upload_date DESC)"""
+
+    @abstractmethod
+    def iter_by_username(self, username: str) -> AsyncIterator[Image]:
+        """Stream all images for a user, newest first, without buffering"""
 
     @abstractmethod
     async def delete(self, filename: str) -> bool:
         """Delete image"""
 
+    @abstractmethod
+    async def delete_by_poster_ids(self, poster_ids: List[int]) -> List[str]:
+        """Delete images attached to the given posters, return their file paths"""
+
 
 class TokenRepository(ABC):
     """Abstract token repository interface"""
@@ -65,8 +81,8 @@ class TokenRepository(ABC):
         """Store refresh token"""
 
     @abstractmethod
-    async def get_username_by_refresh_token(self, token: str) -> Optional[str]:
-        """Get username by refresh token"""
+    async def store_refresh_tokens(self, tokens: List[Tuple[str, str]]) -> int:
+        """Store (token, username) pairs in one statement, return rows added"""
 
     @abstractmethod
     async def delete_refresh_token(self, token: str) -> bool:
@@ -77,8 +93,10 @@ class FileStorage(ABC):
     """Abstract file storage interface"""
 
     @abstractmethod
-    async def save_file(self, file_content: bytes, filename: str) -> str:
-        """Save file and return file path"""
+    async def save_file(
+        self, file_content: Union[bytes, AsyncIterator[bytes]], filename: str
+    ) -> str:
+        """Save file from bytes or an async iterator of chunks, return its path"""
 
     @abstractmethod
     async def delete_file(self, file_path: str) -> bool:
@@ -93,16 +111,28 @@ class RefreshTokenRepository(ABC):
     """Abstract refresh token repository interface"""
 
     @abstractmethod
-    async def create(self, token: str, username: str, expires_at: datetime) -> bool:
-        """Create a new refresh token"""
+    async def create(
+        self, token_hash: bytes, username: str, expires_at: datetime
+    ) -> bool:
+        """Create a new refresh token record keyed by its SHA-256 digest"""
+
+    @abstractmethod
+    async def get_by_hash(self, token_hash: bytes):
+        """Get refresh token by SHA-256 digest"""
 
     @abstractmethod
-    async def get_by_token(self, token: str):
-        """Get refresh token by token string"""
+    async def delete_by_hash(self, token_hash: bytes) -> bool:
+        """Delete refresh token by SHA-256 digest"""
 
     @abstractmethod
-    async def delete_by_token(self, token: str) -> bool:
-        """Delete refresh token by token string"""
+    async def rotate(
+        self,
+        old_token_hash: bytes,
+        new_token_hash: bytes,
+        username: str,
+        expires_at: datetime,
+    ) -> bool:
+        """Replace a refresh token with a new one, False if the old was gone"""
 
 
 class PosterRepository(ABC):
@@ -153,8 +183,8 @@ class PosterRepository(ABC):
     @abstractmethod
     async def archive_and_hard_delete_all_deleted(
         self, username: str, archived_repo
-    ) -> int:
-        """Archive all deleted posters metadata then hard delete, return count"""
+    ) -> List[int]:
+        """Archive all deleted posters metadata then hard delete, return their ids"""
 
 
 class ArchivedPosterRepository(ABC):
@@ -172,6 +202,12 @@ class ArchivedPosterRepository(ABC):
     async def get_by_original_id(self, original_id: int):
         """Get archived poster by original ID"""
 
+    @abstractmethod
+    async def get_by_original_ids(
+        self, original_ids: List[int]
+    ) -> Dict[int, ArchivedPoster]:
+        """Get archived posters for many original IDs, keyed by original ID"""
+
 
 class AlbumRepository(ABC):
     """Abstract album repository interface"""
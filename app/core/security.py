@@ -0,0 +1,10 @@
+"""
+Token hashing shared by the auth service and the token repositories
+"""
+
+import hashlib
+
+
+def hash_token(token: str) -> bytes:
+    """Refresh tokens are persisted as their SHA-256 digest, never in plain text"""
+    return hashlib.sha256(token.encode("utf-8")).digest()
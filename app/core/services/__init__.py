@@ -6,7 +6,7 @@ Contains all business logic services organized by domain
 from .album_service import AlbumService
 from .auth_service import AuthService
 from .email_service import EmailService
-from .image_service import ImageService
+from .image_service import ImageService, invalidate_user_images
 from .poster_service import PosterService
 
 __all__ = [
@@ -15,4 +15,5 @@ __all__ = [
     "ImageService",
     "PosterService",
     "AlbumService",
+    "invalidate_user_images",
 ]
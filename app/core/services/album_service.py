@@ -39,8 +39,7 @@ class AlbumService:
         can_edit = await self.album_repo.can_edit_album(album_id, username)
         if not can_edit:
             raise ValueError("You do not have permission to add images to this album")
-        image = await self.image_repo.get_by_filename(image_id)
-        if not image:
+        if not await self.image_repo.exists(image_id):
             raise ValueError("Image not found")
         return await self.album_repo.add_image(album_id, image_id, username)
 
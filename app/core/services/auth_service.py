@@ -2,18 +2,48 @@
 Authentication and authorization service
 """
 
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import time
 from datetime import datetime, timedelta, timezone
 from typing import List
 
 import bcrypt
+from cachetools import TTLCache
 from jose import jwt
 
 from ..entities import (AdminApprovalRequest, PendingUserInfo, User,
                         UserCreate, UserLogin, UserRegistrationResponse,
                         UserStatus)
 from ..interfaces import RefreshTokenRepository, UserRepository
+from ..security import hash_token
 from .email_service import EmailService
 
+logger = logging.getLogger(__name__)
+
+
+# Admin UIs poll the pending list; AuthService is built per request, so the
+# cache lives at module level and is invalidated whenever the list changes.
+_PENDING_USERS_KEY = "pending"
+_pending_users_cache: TTLCache = TTLCache(maxsize=1, ttl=10)
+
+# Strong references to in-flight notification emails so they are not
+# garbage-collected before they finish.
+_background_tasks: set = set()
+
+
+def _b64url(data: bytes) -> bytes:
+    """Unpadded base64url, as used by JWT"""
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+# Every token we issue has the same header, so its segment is computed once.
+_JWT_HEADER_SEGMENT = _b64url(b'{"alg":"HS256","typ":"JWT"}') + b"."
+
 
 class AuthService:
     """Authentication and authorization service"""
@@ -34,6 +64,7 @@ class AuthService:
         self.algorithm = "HS256"
         self.access_token_expire_minutes = 30
         self.refresh_token_expire_days = 7
+        self._signing_key = secret_key.encode("utf-8")
 
     async def register_user(self, user_data: UserCreate) -> UserRegistrationResponse:
         """Register a new user (pending admin approval)"""
@@ -47,9 +78,11 @@ class AuthService:
         if existing_email:
             raise ValueError("Email already registered")
 
-        # Hash password
-        hashed_password = bcrypt.hashpw(
-            user_data.password.encode("utf-8"), bcrypt.gensalt()
+        # Hash password (bcrypt is CPU-bound, keep it off the event loop)
+        hashed_password = (
+            await asyncio.to_thread(
+                bcrypt.hashpw, user_data.password.encode("utf-8"), bcrypt.gensalt()
+            )
         ).decode("utf-8")
 
         # Create user with pending status
@@ -62,6 +95,7 @@ class AuthService:
         )
 
         await self.user_repository.create(user)
+        _pending_users_cache.pop(_PENDING_USERS_KEY, None)
 
         # Send notification to admin (optional - don't fail registration if email fails)
         try:
@@ -70,10 +104,7 @@ class AuthService:
             )
         except Exception as e:
             # Log the error but don't fail the registration
-            import logging
-
-            logger = logging.getLogger(__name__)
-            logger.warning(f"Failed to send registration notification email: {e}")
+            logger.warning("Failed to send registration notification email: %s", e)
 
         return UserRegistrationResponse(
             message=(
@@ -103,30 +134,31 @@ class AuthService:
         if not user.is_active:
             raise ValueError("Account is deactivated")
 
-        # Verify password
-        if not bcrypt.checkpw(
-            credentials.password.encode("utf-8"), user.hashed_password.encode("utf-8")
+        # Verify password (bcrypt is CPU-bound, keep it off the event loop)
+        if not await asyncio.to_thread(
+            bcrypt.checkpw,
+            credentials.password.encode("utf-8"),
+            user.hashed_password.encode("utf-8"),
         ):
             raise ValueError("Invalid username or password")
 
         # Create tokens
         access_token = self._create_access_token(user.username, user.is_admin)
         refresh_token = self._create_refresh_token(user.username, user.is_admin)
+        now = datetime.now(timezone.utc)
 
         # Store refresh token
         await self.refresh_token_repository.create(
-            token=refresh_token,
+            token_hash=hash_token(refresh_token),
             username=user.username,
-            expires_at=datetime.now(timezone.utc)
-            + timedelta(days=self.refresh_token_expire_days),
+            expires_at=now + timedelta(days=self.refresh_token_expire_days),
         )
 
         return {
             "access_token": access_token,
             "refresh_token": refresh_token,
             "token_type": "bearer",
-            "expires_at": datetime.now(timezone.utc)
-            + timedelta(minutes=self.access_token_expire_minutes),
+            "expires_at": now + timedelta(minutes=self.access_token_expire_minutes),
             "username": user.username,
         }
 
@@ -145,17 +177,15 @@ class AuthService:
             user.approved_at = datetime.now(timezone.utc)
             user.approved_by = request.admin_username
             await self.user_repository.update(user)
+            _pending_users_cache.pop(_PENDING_USERS_KEY, None)
 
-            # Send approval notification (optional - don't fail if email fails)
-            try:
-                await self.email_service.send_approval_notification(
+            # Send approval notification in the background (optional)
+            self._notify_in_background(
+                self.email_service.send_approval_notification(
                     user.email, user.username, True, request.reason
-                )
-            except Exception as e:
-                import logging
-
-                logger = logging.getLogger(__name__)
-                logger.warning(f"Failed to send approval notification email: {e}")
+                ),
+                "approval",
+            )
 
             return {"message": f"User {user.username} approved successfully"}
 
@@ -163,51 +193,78 @@ class AuthService:
             user.status = UserStatus.REJECTED
             user.is_active = False
             await self.user_repository.update(user)
+            _pending_users_cache.pop(_PENDING_USERS_KEY, None)
 
-            # Send rejection notification (optional - don't fail if email fails)
-            try:
-                await self.email_service.send_approval_notification(
+            # Send rejection notification in the background (optional)
+            self._notify_in_background(
+                self.email_service.send_approval_notification(
                     user.email, user.username, False, request.reason
-                )
-            except Exception as e:
-                import logging
-
-                logger = logging.getLogger(__name__)
-                logger.warning(f"Failed to send rejection notification email: {e}")
+                ),
+                "rejection",
+            )
 
             return {"message": f"User {user.username} rejected"}
         else:
             raise ValueError("Invalid action. Use 'approve' or 'reject'")
 
+    def _notify_in_background(self, coro, kind: str) -> None:
+        """Send a notification email without holding up the response"""
+
+        async def _send():
+            try:
+                await coro
+            except Exception as e:
+                # Don't fail the approval/rejection if email fails
+                logger.warning("Failed to send %s notification email: %s", kind, e)
+
+        task = asyncio.create_task(_send())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
     async def get_pending_users(self) -> List[PendingUserInfo]:
         """Get list of pending user registrations"""
+        cached = _pending_users_cache.get(_PENDING_USERS_KEY)
+        if cached is not None:
+            return cached
+
         users = await self.user_repository.get_by_status(UserStatus.PENDING)
-        return [
+        pending = [
             PendingUserInfo(
                 username=user.username, email=user.email, created_at=user.created_at
             )
             for user in users
         ]
+        _pending_users_cache[_PENDING_USERS_KEY] = pending
+        return pending
+
+    def _encode_token(
+        self, username: str, is_admin: bool, expires_in: int, token_type: str
+    ) -> str:
+        """Encode a fixed-shape HS256 JWT without going through jose"""
+        payload = json.dumps(
+            {
+                "sub": username,
+                "is_admin": is_admin,
+                "exp": int(time.time()) + expires_in,
+                "type": token_type,
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+        signing_input = _JWT_HEADER_SEGMENT + _b64url(payload)
+        signature = hmac.new(self._signing_key, signing_input, hashlib.sha256)
+        return (signing_input + b"." + _b64url(signature.digest())).decode("ascii")
 
     def _create_access_token(self, username: str, is_admin: bool = False) -> str:
         """Create JWT access token"""
-        to_encode = {
-            "sub": username,
-            "is_admin": is_admin,
-            "exp": datetime.now(timezone.utc)
-            + timedelta(minutes=self.access_token_expire_minutes),
-        }
-        return jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
+        return self._encode_token(
+            username, is_admin, self.access_token_expire_minutes * 60, "access"
+        )
 
     def _create_refresh_token(self, username: str, is_admin: bool = False) -> str:
         """Create JWT refresh token"""
-        to_encode = {
-            "sub": username,
-            "is_admin": is_admin,
-            "exp": datetime.now(timezone.utc)
-            + timedelta(days=self.refresh_token_expire_days),
-        }
-        return jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
+        return self._encode_token(
+            username, is_admin, self.refresh_token_expire_days * 86400, "refresh"
+        )
 
     def verify_token(self, token: str) -> str:
         """Verify JWT token and return username"""
@@ -226,13 +283,18 @@ class AuthService:
         username = self.verify_token(refresh_token)
 
         # Check if refresh token exists in database
-        stored_token = await self.refresh_token_repository.get_by_token(refresh_token)
-        if not stored_token:
+        token_hash = hash_token(refresh_token)
+        stored_token = await self.refresh_token_repository.get_by_hash(token_hash)
+        # Constant-time check that the token was issued to the same user
+        if stored_token is None or not hmac.compare_digest(
+            stored_token.username.encode("utf-8"), username.encode("utf-8")
+        ):
             raise ValueError("Invalid refresh token")
 
         # Check if token is expired
-        if stored_token.expires_at < datetime.now(timezone.utc):
-            await self.refresh_token_repository.delete_by_token(refresh_token)
+        now = datetime.now(timezone.utc)
+        if stored_token.expires_at < now:
+            await self.refresh_token_repository.delete_by_hash(token_hash)
             raise ValueError("Refresh token expired")
 
         # Get user
@@ -244,24 +306,25 @@ class AuthService:
         new_access_token = self._create_access_token(username, user.is_admin)
         new_refresh_token = self._create_refresh_token(username, user.is_admin)
 
-        # Store new refresh token and delete old one
-        await self.refresh_token_repository.delete_by_token(refresh_token)
-        await self.refresh_token_repository.create(
-            token=new_refresh_token,
+        # Replace the old refresh token with the new one in one statement;
+        # fails if a concurrent refresh already used the old token
+        rotated = await self.refresh_token_repository.rotate(
+            old_token_hash=token_hash,
+            new_token_hash=hash_token(new_refresh_token),
             username=username,
-            expires_at=datetime.now(timezone.utc)
-            + timedelta(days=self.refresh_token_expire_days),
+            expires_at=now + timedelta(days=self.refresh_token_expire_days),
         )
+        if not rotated:
+            raise ValueError("Invalid refresh token")
 
         return {
             "access_token": new_access_token,
             "refresh_token": new_refresh_token,
             "token_type": "bearer",
-            "expires_at": datetime.now(timezone.utc)
-            + timedelta(minutes=self.access_token_expire_minutes),
+            "expires_at": now + timedelta(minutes=self.access_token_expire_minutes),
             "username": user.username,
         }
 
     async def logout_user(self, refresh_token: str, username: str):
         """Logout user by invalidating refresh token"""
-        await self.refresh_token_repository.delete_by_token(refresh_token)
+        await self.refresh_token_repository.delete_by_hash(hash_token(refresh_token))
@@ -6,6 +6,48 @@ from datetime import datetime, timezone
 from typing import Optional
 
 from fastapi_mail import ConnectionConfig, FastMail, MessageSchema
+from jinja2 import Template
+
+# Compiled once at import time; autoescape keeps user-supplied values inert
+_REGISTRATION_TEMPLATE = Template(
+    """
+    <html>
+        <body>
+            <h2>New User Registration</h2>
+            <p>A new user has registered for an account:</p>
+            <ul>
+                <li><strong>Username:</strong> {{ username }}</li>
+                <li><strong>Email:</strong> {{ user_email }}</li>
+                <li><strong>Registration Date:</strong> {{ registration_time }}</li>
+            </ul>
+            <p>Please review and approve/reject this registration.</p>
+            <p>You can approve or reject this user through the admin interface.
+            </p>
+        </body>
+    </html>
+    """,
+    autoescape=True,
+)
+
+_APPROVAL_TEMPLATE = Template(
+    """
+    <html>
+        <body>
+            <h2>Account {{ status | title }}</h2>
+            <p>Dear {{ username }},</p>
+            <p>Your account registration has been <strong>{{ status }}</strong>.</p>
+            {% if approved %}
+            <p>You can now log in to your account and start using our services.</p>
+            <p>Thank you for choosing LinkLink Server!</p>
+            {% else %}
+            <p>Reason: {{ reason or "No specific reason provided" }}</p>
+            <p>If you believe this was an error, please contact support.</p>
+            {% endif %}
+        </body>
+    </html>
+    """,
+    autoescape=True,
+)
 
 
 class EmailService:
@@ -22,22 +64,11 @@ class EmailService:
         message = MessageSchema(
             subject="New User Registration - LinkLink Server",
             recipients=[admin_email],
-            body=f"""
-            <html>
-                <body>
-                    <h2>New User Registration</h2>
-                    <p>A new user has registered for an account:</p>
-                    <ul>
-                        <li><strong>Username:</strong> {username}</li>
-                        <li><strong>Email:</strong> {user_email}</li>
-                        <li><strong>Registration Date:</strong> {registration_time}</li>
-                    </ul>
-                    <p>Please review and approve/reject this registration.</p>
-                    <p>You can approve or reject this user through the admin interface.
-                    </p>
-                </body>
-            </html>
-            """,
+            body=_REGISTRATION_TEMPLATE.render(
+                username=username,
+                user_email=user_email,
+                registration_time=registration_time,
+            ),
             subtype="html",
         )
         await self.fastmail.send_message(message)
@@ -53,30 +84,9 @@ class EmailService:
         status = "approved" if approved else "rejected"
         subject = f"Account {status.title()} - LinkLink Server"
 
-        body_content = f"""
-        <html>
-            <body>
-                <h2>Account {status.title()}</h2>
-                <p>Dear {username},</p>
-                <p>Your account registration has been <strong>{status}</strong>.</p>
-        """
-
-        if approved:
-            body_content += """
-                <p>You can now log in to your account and start using our services.</p>
-                <p>Thank you for choosing LinkLink Server!</p>
-            """
-        else:
-            reason_text = reason or "No specific reason provided"
-            body_content += f"""
-                <p>Reason: {reason_text}</p>
-                <p>If you believe this was an error, please contact support.</p>
-            """
-
-        body_content += """
-            </body>
-        </html>
-        """
+        body_content = _APPROVAL_TEMPLATE.render(
+            status=status, username=username, approved=approved, reason=reason
+        )
 
         message = MessageSchema(
             subject=subject, recipients=[user_email], body=body_content, subtype="html"
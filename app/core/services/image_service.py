@@ -2,13 +2,94 @@
 Image management business logic
 """
 
+import asyncio
+import itertools
 import os
-from datetime import datetime, timezone
-from typing import List, Optional
+import time
+from typing import AsyncIterator, List, Optional
+
+import aiofiles
+from cachetools import TTLCache
 
 from ..entities import Image, ImageInfo
 from ..interfaces import FileStorage, ImageRepository
 
+# Leading bytes needed to recognise every supported image format
+_SNIFF_LENGTH = 12
+
+_MAGIC_NUMBERS = {
+    b"\xff\xd8\xff": "image/jpeg",
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"GIF87a": "image/gif",
+    b"GIF89a": "image/gif",
+}
+
+_ALLOWED_EXTENSIONS = frozenset({"jpg", "jpeg", "png", "gif", "webp"})
+
+# Non-standard MIME types some clients still send
+_CONTENT_TYPE_ALIASES = {"image/jpg": "image/jpeg", "image/pjpeg": "image/jpeg"}
+
+# Process-wide so filenames stay unique across per-request ImageService instances
+_filename_counter = itertools.count()
+
+# Upload directories already created by this process, so the common case
+# skips os.makedirs. Bounded; evicted entries are simply re-created.
+_MAX_KNOWN_DIRS = 4096
+_known_dirs: set = set()
+
+# Per-user image listings, keyed by username. Module level because
+# ImageService is built per request; every write path that adds or removes a
+# user's images must call invalidate_user_images.
+_user_images_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+
+
+def invalidate_user_images(username: str) -> None:
+    """Drop the cached image listing for a user"""
+    _user_images_cache.pop(username, None)
+
+
+async def _make_upload_dir(path: str) -> None:
+    """Create an upload directory and remember that it exists"""
+    await asyncio.to_thread(os.makedirs, path, exist_ok=True)
+    if len(_known_dirs) >= _MAX_KNOWN_DIRS:
+        _known_dirs.pop()
+    _known_dirs.add(path)
+
+
+def _sniff_content_type(head: bytes) -> Optional[str]:
+    """Detect an image MIME type from its magic number"""
+    for magic, content_type in _MAGIC_NUMBERS.items():
+        if head.startswith(magic):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def _to_public_path(fp: str) -> str:
+    """Always return a public path starting with /uploads/"""
+    if not fp:
+        return ""
+    fp = fp.replace("\\", "/")  # Windows compatibility
+    if fp.startswith("/uploads/"):
+        return fp
+    if fp.startswith("uploads/"):
+        return "/" + fp
+    # fallback: just return filename under uploads
+    return "/uploads/" + fp.rpartition("/")[2]
+
+
+def _to_image_info(img: Image) -> dict:
+    """Public listing fields for an image"""
+    return {
+        "filename": img.filename,
+        "original_filename": img.original_filename,
+        "upload_date": img.upload_date,
+        "file_size": img.file_size,
+        "content_type": img.content_type,
+        "file_path": _to_public_path(img.file_path),
+    }
+
 
 class ImageService:
     """Image management business logic"""
@@ -24,70 +105,138 @@ class ImageService:
         self.image_repo = image_repo
         self.file_storage = file_storage
         self.upload_dir = upload_dir
+        # Trailing separators stripped once so paths can be built with f-strings
+        self._upload_root = upload_dir.rstrip("/" + os.sep)
         self.max_file_size = max_file_size
-        self.allowed_types = allowed_types or [
-            "image/jpeg",
-            "image/png",
-            "image/gif",
-            "image/webp",
-        ]
+        self.allowed_types = frozenset(
+            allowed_types or ["image/jpeg", "image/png", "image/gif", "image/webp"]
+        )
 
     def _validate_file(
-        self, file_content: bytes, content_type: str, original_filename: str
-    ) -> None:
-        """Validate uploaded file"""
-        if not content_type.startswith("image/"):
+        self, head: bytes, declared_type: str, original_filename: str
+    ) -> str:
+        """Validate uploaded file from its leading bytes, return its MIME type"""
+        content_type = _sniff_content_type(head)
+        if content_type is None:
             raise ValueError("File must be an image")
 
         if content_type not in self.allowed_types:
             raise ValueError(f"File type {content_type} not allowed")
 
-        if len(file_content) > self.max_file_size:
-            raise ValueError(f"File size exceeds maximum of {self.max_file_size} bytes")
+        # Generic types (e.g. application/octet-stream) carry no claim to check
+        declared_type = declared_type.split(";", 1)[0].strip().lower()
+        declared_type = _CONTENT_TYPE_ALIASES.get(declared_type, declared_type)
+        if declared_type.startswith("image/") and declared_type != content_type:
+            raise ValueError(
+                f"File content ({content_type}) does not match "
+                f"declared type {declared_type}"
+            )
 
         if not original_filename:
             raise ValueError("Filename is required")
 
-    def _generate_filename(self, username: str, original_filename: str) -> str:
+        return content_type
+
+    async def _read_head(self, file_chunks: AsyncIterator[bytes]) -> bytes:
+        """Read just enough of an upload stream to sniff its type"""
+        head = b""
+        async for chunk in file_chunks:
+            head += chunk
+            if len(head) >= _SNIFF_LENGTH:
+                break
+        return head
+
+    async def _write_limited(
+        self, file_path: str, file_chunks: AsyncIterator[bytes], head: bytes = b""
+    ) -> int:
+        """Stream an upload to disk, aborting once it exceeds max_file_size
+
+        Returns the number of bytes written. A partially written file is
+        removed if the upload is rejected or the write fails.
+        """
+        size = len(head)
+        try:
+            async with aiofiles.open(file_path, "wb") as f:
+                await f.write(head)
+                async for chunk in file_chunks:
+                    size += len(chunk)
+                    if size > self.max_file_size:
+                        raise ValueError(
+                            f"File size exceeds maximum of {self.max_file_size} bytes"
+                        )
+                    await f.write(chunk)
+        except BaseException:
+            # Synchronous so the cleanup also runs when the request is cancelled
+            self._remove_partial(file_path)
+            raise
+        return size
+
+    @staticmethod
+    def _remove_partial(file_path: str) -> None:
+        """Remove a partially written upload, if any"""
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+
+    def _generate_filename(
+        self, username: str, original_filename: str, timestamp_ms: Optional[int] = None
+    ) -> str:
         """Generate unique filename"""
-        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-        file_extension = (
-            original_filename.split(".")[-1] if "." in original_filename else "jpg"
-        )
-        return f"{username}_{timestamp}.{file_extension}"
+        file_extension = original_filename.rpartition(".")[2].lower()
+        if file_extension not in _ALLOWED_EXTENSIONS:
+            file_extension = "jpg"
+        if timestamp_ms is None:
+            timestamp_ms = time.time_ns() // 1_000_000
+        return f"{username}_{timestamp_ms}_{next(_filename_counter)}.{file_extension}"
 
     async def upload_image(
         self,
         username: str,
-        file_content: bytes,
+        file_chunks: AsyncIterator[bytes],
         content_type: str,
         original_filename: str,
     ) -> Image:
-        """Upload image for user"""
-        # Validate file
-        self._validate_file(file_content, content_type, original_filename)
+        """Upload image for user from a stream of byte chunks
+
+        The stored content type is sniffed from the file's magic bytes; an
+        image ``content_type`` declared by the client must agree with it.
+        """
+        # Validate file type before reading the rest of the body
+        file_chunks = file_chunks.__aiter__()
+        head = await self._read_head(file_chunks)
+        content_type = self._validate_file(head, content_type, original_filename)
+        if len(head) > self.max_file_size:
+            raise ValueError(f"File size exceeds maximum of {self.max_file_size} bytes")
+
+        # One clock read for both the filename and the date directory
+        now_ns = time.time_ns()
+        now = time.gmtime(now_ns // 1_000_000_000)
 
         # Generate unique filename
-        filename = self._generate_filename(username, original_filename)
-
-        # Tạo đường dẫn thư mục theo ngày + user
-        now = datetime.now(timezone.utc)
-        subdir = os.path.join(
-            self.upload_dir,
-            str(now.year),
-            f"{now.month:02d}",
-            f"{now.day:02d}",
-            username,
+        filename = self._generate_filename(
+            username, original_filename, now_ns // 1_000_000
         )
-        os.makedirs(subdir, exist_ok=True)
-        file_path = os.path.join(subdir, filename)
 
-        # Save file
-        async def _save():
-            with open(file_path, "wb") as f:
-                f.write(file_content)
+        # Tạo đường dẫn thư mục theo ngày + user (UTC)
+        sep = os.sep
+        subdir = (
+            f"{self._upload_root}{sep}{now.tm_year}{sep}{now.tm_mon:02d}"
+            f"{sep}{now.tm_mday:02d}{sep}{username}"
+        )
+        if subdir not in _known_dirs:
+            await _make_upload_dir(subdir)
+        file_path = f"{subdir}{sep}{filename}"
 
-        await _save()
+        # Stream the rest of the body straight to disk
+        try:
+            file_size = await self._write_limited(file_path, file_chunks, head)
+        except FileNotFoundError:
+            # Directory removed behind our back. The open failed, so no chunk
+            # has been consumed yet: re-create it and write once more.
+            _known_dirs.discard(subdir)
+            await _make_upload_dir(subdir)
+            file_size = await self._write_limited(file_path, file_chunks, head)
 
         # Create image record
         image = Image(
@@ -95,39 +244,30 @@ class ImageService:
             original_filename=original_filename,
             username=username,
             file_path=file_path,
-            file_size=len(file_content),
+            file_size=file_size,
             content_type=content_type,
         )
 
-        return await self.image_repo.create(image)
+        created = await self.image_repo.create(image)
+        invalidate_user_images(username)
+        return created
 
     async def get_user_images(self, username: str) -> List[ImageInfo]:
-        """Get all images for a user"""
+        """Get all images for a user, newest first"""
+        cached = _user_images_cache.get(username)
+        if cached is not None:
+            return cached
+
+        # Repository already returns rows ordered by upload_date DESC
         images = await self.image_repo.get_by_username(username)
+        result = [_to_image_info(img) for img in images]
+        _user_images_cache[username] = result
+        return result
 
-        def to_public_path(fp):
-            # Always return a public path starting with /uploads/
-            if not fp:
-                return ""
-            fp = fp.replace("\\", "/")  # Windows compatibility
-            if fp.startswith("/uploads/"):
-                return fp
-            if fp.startswith("uploads/"):
-                return "/" + fp
-            # fallback: just return filename under uploads
-            return "/uploads/" + os.path.basename(fp)
-
-        return [
-            {
-                "filename": img.filename,
-                "original_filename": img.original_filename,
-                "upload_date": img.upload_date,
-                "file_size": img.file_size,
-                "content_type": img.content_type,
-                "file_path": to_public_path(img.file_path),
-            }
-            for img in sorted(images, key=lambda x: x.upload_date, reverse=True)
-        ]
+    async def iter_user_images(self, username: str) -> AsyncIterator[dict]:
+        """Stream all images for a user, newest first, one row at a time"""
+        async for img in self.image_repo.iter_by_username(username):
+            yield _to_image_info(img)
 
     async def get_image(self, filename: str, username: str) -> Optional[Image]:
         """Get specific image (with ownership check)"""
@@ -146,4 +286,6 @@ class ImageService:
         await self.file_storage.delete_file(image.file_path)
 
         # Delete from repository
-        return await self.image_repo.delete(filename)
+        deleted = await self.image_repo.delete(filename)
+        invalidate_user_images(username)
+        return deleted
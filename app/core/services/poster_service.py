@@ -2,10 +2,22 @@
 Poster management business logic
 """
 
-from typing import Optional
+import asyncio
+from contextlib import nullcontext
+from typing import AsyncContextManager, Callable, List, Optional
+
+from cachetools import TTLCache
 
 from ..interfaces import (ArchivedPosterRepository, FileStorage,
-                          PosterRepository)
+                          ImageRepository, PosterRepository)
+
+# Archived posters per username. Archives only change through the hard-delete
+# methods below, which invalidate the entry; module level because
+# PosterService is built per request.
+_archived_posts_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+
+# Image files removed concurrently when posters are hard deleted
+_FILE_DELETE_CONCURRENCY = 16
 
 
 class PosterService:
@@ -15,13 +27,18 @@ class PosterService:
         self,
         poster_repo: PosterRepository,
         archived_repo: ArchivedPosterRepository,
+        image_repo: ImageRepository,
         file_storage: FileStorage,
         upload_dir: str = "uploads",
+        transaction: Callable[[], AsyncContextManager] = nullcontext,
     ):
         self.poster_repo = poster_repo
         self.archived_repo = archived_repo
+        self.image_repo = image_repo
         self.file_storage = file_storage
         self.upload_dir = upload_dir
+        # Groups related repository writes into one commit
+        self.transaction = transaction
 
     async def edit_poster(
         self,
@@ -79,28 +96,52 @@ class PosterService:
         if not poster.is_deleted:
             raise ValueError("Poster must be deleted first (in trash)")
 
-        # Note: Image file deletion is now handled in the route layer
-        # since images are stored separately and linked via poster_id
-
-        # Archive and hard delete, and return the archived poster
-        archived = await self.poster_repo.archive_and_hard_delete(
-            poster_id, self.archived_repo
-        )
-        if not archived:
-            raise ValueError("Failed to archive poster")
+        # Archive, hard delete and drop the image rows in one transaction.
+        # Archiving runs first so it can still record the poster's first image.
+        async with self.transaction():
+            archived = await self.poster_repo.archive_and_hard_delete(
+                poster_id, self.archived_repo
+            )
+            if not archived:
+                raise ValueError("Failed to archive poster")
+            # Images are stored separately and linked via poster_id
+            file_paths = await self.image_repo.delete_by_poster_ids([poster_id])
+        _archived_posts_cache.pop(username, None)
+
+        # Files go only once the rows are committed
+        await self.delete_image_files(file_paths)
         return archived
 
     async def hard_delete_all_deleted(self, username: str):
-        # Note: Image file deletion is now handled in the route layer
-        # since images are stored separately and linked via poster_id
+        async with self.transaction():
+            archived_ids = await self.poster_repo.archive_and_hard_delete_all_deleted(
+                username, self.archived_repo
+            )
+            # Exactly the posters that were archived, including any trashed
+            # since the caller last listed them
+            file_paths = await self.image_repo.delete_by_poster_ids(archived_ids)
+        _archived_posts_cache.pop(username, None)
+
+        # Files go only once the rows are committed
+        await self.delete_image_files(file_paths)
+        return len(archived_ids)
+
+    async def delete_image_files(self, file_paths: List[str]) -> None:
+        """Remove image files from storage with bounded concurrency"""
+        semaphore = asyncio.Semaphore(_FILE_DELETE_CONCURRENCY)
+
+        async def _delete(file_path: str) -> None:
+            async with semaphore:
+                await self.file_storage.delete_file(file_path)
 
-        count = await self.poster_repo.archive_and_hard_delete_all_deleted(
-            username, self.archived_repo
-        )
-        return count
+        await asyncio.gather(*(_delete(file_path) for file_path in file_paths))
 
     async def get_archived_posts(self, username: str):
-        return await self.archived_repo.get_by_username(username)
+        cached = _archived_posts_cache.get(username)
+        if cached is None:
+            cached = await self.archived_repo.get_by_username(username)
+            _archived_posts_cache[username] = cached
+        return cached
 
     async def restore_post(self, poster_id: int, username: str):
         poster = await self.poster_repo.get_by_id(poster_id)
@@ -5,7 +5,7 @@ Global exception handlers
 import logging
 
 from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from pydantic import ValidationError as PydanticValidationError
 
 from .models import CustomHTTPException
@@ -13,71 +13,69 @@ from .models import CustomHTTPException
 logger = logging.getLogger(__name__)
 
 
+def _error_response(
+    status_code: int, detail: str, error_code: str, **extra
+) -> ORJSONResponse:
+    """Build the standard error body plus any extra fields"""
+    content = {"detail": detail, "error_code": error_code, "status_code": status_code}
+    content.update(extra)
+    return ORJSONResponse(status_code=status_code, content=content)
+
+
 async def custom_http_exception_handler(
     request: Request, exc: CustomHTTPException
-) -> JSONResponse:
+) -> ORJSONResponse:
     """Handle custom HTTP exceptions"""
-    error_response = {
-        "detail": exc.detail,
-        "error_code": exc.error_code,
-        "status_code": exc.status_code,
-    }
-
-    if exc.context:
-        error_response["context"] = exc.context
-
     logger.error(
-        f"Custom HTTP Exception: {exc.status_code} - {exc.detail}",
+        "Custom HTTP Exception: %s - %s",
+        exc.status_code,
+        exc.detail,
         extra={"error_code": exc.error_code, "context": exc.context},
     )
 
-    return JSONResponse(status_code=exc.status_code, content=error_response)
+    extra = {"context": exc.context} if exc.context else {}
+    return _error_response(exc.status_code, exc.detail, exc.error_code, **extra)
 
 
 async def validation_exception_handler(
     request: Request, exc: PydanticValidationError
-) -> JSONResponse:
+) -> ORJSONResponse:
     """Handle Pydantic validation errors"""
-    error_details = []
-    for error in exc.errors():
-        error_details.append(
-            {
-                "field": " -> ".join(str(loc) for loc in error["loc"]),
-                "message": error["msg"],
-                "type": error["type"],
-            }
-        )
-
-    error_response = {
-        "detail": "Validation error",
-        "error_code": "VALIDATION_ERROR",
-        "status_code": status.HTTP_422_UNPROCESSABLE_ENTITY,
-        "errors": error_details,
-    }
+    error_details = [
+        {
+            "field": " -> ".join(str(loc) for loc in error["loc"]),
+            "message": error["msg"],
+            "type": error["type"],
+        }
+        for error in exc.errors()
+    ]
 
     logger.warning(
-        f"Validation Error: {len(error_details)} field(s) failed validation",
+        "Validation Error: %d field(s) failed validation",
+        len(error_details),
         extra={"errors": error_details},
     )
 
-    return JSONResponse(
-        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content=error_response
+    return _error_response(
+        status.HTTP_422_UNPROCESSABLE_ENTITY,
+        "Validation error",
+        "VALIDATION_ERROR",
+        errors=error_details,
     )
 
 
-async def general_exception_handler(request: Request, exc: Exception) -> JSONResponse:
+async def general_exception_handler(
+    request: Request, exc: Exception
+) -> ORJSONResponse:
     """Handle general exceptions"""
     logger.error(
-        f"Unhandled Exception: {type(exc).__name__} - {str(exc)}", exc_info=True
+        "Unhandled Exception: %s - %s", type(exc).__name__, exc, exc_info=True
     )
 
-    return JSONResponse(
-        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        content={
-            "detail": "Internal server error",
-            "error_code": "INTERNAL_SERVER_ERROR",
-            "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-        },
+    return _error_response(
+        status.HTTP_500_INTERNAL_SERVER_ERROR,
+        "Internal server error",
+        "INTERNAL_SERVER_ERROR",
     )
 
 
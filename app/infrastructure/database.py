@@ -3,11 +3,14 @@ Database configuration and session management
 """
 
 import os
-from typing import AsyncGenerator
+from contextlib import asynccontextmanager
+from typing import (Any, AsyncGenerator, AsyncIterator, Callable, List,
+                    TypeVar)
 
 from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
                                     create_async_engine)
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from ..config import settings
 
@@ -18,8 +21,17 @@ DATABASE_URL = settings.DATABASE_URL
 engine = create_async_engine(
     DATABASE_URL,
     echo=os.getenv("DB_ECHO", "false").lower() == "true",
-    pool_pre_ping=True,
-    pool_recycle=300,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    connect_args={
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        # Short OLTP queries don't benefit from JIT, it only adds latency
+        "server_settings": {"jit": "off"},
+    },
 )
 
 # Create async session factory
@@ -35,11 +47,74 @@ class Base(DeclarativeBase):
 
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     """Dependency to get database session"""
+    # The context manager closes the session, including on errors
     async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+        yield session
+
+
+# Session.info flag set while a unit of work owns the transaction
+_UNIT_OF_WORK = "unit_of_work"
+# Session.info list of callbacks to run once the unit of work commits
+_AFTER_COMMIT = "after_commit"
+
+
+@asynccontextmanager
+async def unit_of_work(session: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """Group repository writes into one transaction, committed once on exit
+
+    Repositories only flush inside the block, so a handler doing several
+    related writes pays for a single commit and they succeed or fail together.
+    Any exception rolls the whole block back.
+    """
+    if session.info.get(_UNIT_OF_WORK):
+        # Nested blocks join the outermost one
+        yield session
+        return
+    session.info[_UNIT_OF_WORK] = True
+    session.info[_AFTER_COMMIT] = []
+    try:
+        yield session
+        await session.commit()
+    except BaseException:
+        await session.rollback()
+        raise
+    else:
+        for callback in session.info[_AFTER_COMMIT]:
+            callback()
+    finally:
+        session.info.pop(_UNIT_OF_WORK, None)
+        session.info.pop(_AFTER_COMMIT, None)
+
+
+async def commit_or_flush(session: AsyncSession) -> None:
+    """Commit a repository write, or only flush it inside a unit of work"""
+    if session.info.get(_UNIT_OF_WORK):
+        await session.flush()
+    else:
+        await session.commit()
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """Run ``callback`` once the current write is committed
+
+    Inside a unit of work that is when the block commits (never, if it rolls
+    back); otherwise the write has already been committed, so it runs now.
+    """
+    if session.info.get(_UNIT_OF_WORK):
+        session.info[_AFTER_COMMIT].append(callback)
+    else:
+        callback()
+
+
+T = TypeVar("T")
+
+
+async def map_partitions(result, build: Callable[[Any], T]) -> List[T]:
+    """Build entities from a streamed result one fetched batch at a time"""
+    entities: List[T] = []
+    async for partition in result.partitions():
+        entities.extend(map(build, partition))
+    return entities
 
 
 async def init_db():
@@ -0,0 +1,31 @@
+"""
+Periodic database maintenance tasks
+"""
+
+import asyncio
+import logging
+
+from .database import AsyncSessionLocal
+from .repositories import PostgreSQLTokenRepository
+
+logger = logging.getLogger(__name__)
+
+# How often expired refresh tokens are purged
+TOKEN_CLEANUP_INTERVAL_SECONDS = 60 * 60
+
+
+async def purge_expired_tokens_periodically(
+    interval: float = TOKEN_CLEANUP_INTERVAL_SECONDS,
+) -> None:
+    """Delete expired refresh tokens every ``interval`` seconds until cancelled"""
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                repo = PostgreSQLTokenRepository(session)
+                removed = await repo.cleanup_expired_tokens()
+            if removed:
+                logger.info("Purged %d expired refresh tokens", removed)
+        except Exception as e:
+            # Never let a failed run stop the loop
+            logger.warning("Expired refresh token cleanup failed: %s", e)
+        await asyncio.sleep(interval)
@@ -2,11 +2,41 @@
 SQLAlchemy database models
 """
 
-from sqlalchemy import Boolean, Column, DateTime, Enum, Integer, String, Text
+from operator import attrgetter
+
+from sqlalchemy import (Boolean, Column, DateTime, Enum, Index, Integer,
+                        LargeBinary, String, Text)
 from sqlalchemy.sql import func
 
+from ..core.entities import Image, User, UserStatus
 from .database import Base
 
+# Columns copied onto the domain entities, read in one C-level attrgetter call
+_USER_FIELDS = (
+    "username",
+    "email",
+    "hashed_password",
+    "is_active",
+    "is_admin",
+    "status",
+    "created_at",
+    "updated_at",
+    "approved_at",
+    "approved_by",
+)
+_get_user_fields = attrgetter(*_USER_FIELDS)
+
+_IMAGE_FIELDS = (
+    "filename",
+    "original_filename",
+    "username",
+    "file_path",
+    "file_size",
+    "content_type",
+    "upload_date",
+)
+_get_image_fields = attrgetter(*_IMAGE_FIELDS)
+
 
 class UserModel(Base):
     """User database model"""
@@ -28,6 +58,12 @@ class UserModel(Base):
     approved_at = Column(DateTime(timezone=True), nullable=True)
     approved_by = Column(String(50), nullable=True)
 
+    def to_entity(self) -> User:
+        """Map this row to the User domain entity"""
+        values = dict(zip(_USER_FIELDS, _get_user_fields(self)))
+        values["status"] = UserStatus(values["status"])
+        return User(**values)
+
 
 class ImageModel(Base):
     """Image database model"""
@@ -43,16 +79,25 @@ class ImageModel(Base):
     upload_date = Column(DateTime(timezone=True), server_default=func.now())
     poster_id = Column(Integer, nullable=True, index=True)  # Liên kết với posters.id
 
+    # Serves "a user's images, newest first" straight from the index
+    __table_args__ = (
+        Index("ix_images_username_upload_date", username, upload_date.desc()),
+    )
+
+    def to_entity(self) -> Image:
+        """Map this row to the Image domain entity"""
+        return Image(**dict(zip(_IMAGE_FIELDS, _get_image_fields(self))))
+
 
 class RefreshTokenModel(Base):
     """Refresh token database model"""
 
     __tablename__ = "refresh_tokens"
 
-    token = Column(String(500), primary_key=True, index=True)
+    token_hash = Column(LargeBinary(32), primary_key=True)  # SHA-256 of the JWT
     username = Column(String(50), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
 
 
 class PosterModel(Base):
@@ -71,6 +116,25 @@ class PosterModel(Base):
     is_deleted = Column(Boolean, default=False, nullable=False)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
 
+    # Fetch server defaults (created_at) from the INSERT's RETURNING clause
+    # so ORM-added posters need no refresh() SELECT
+    __mapper_args__ = {"eager_defaults": True}
+
+    # Partial indexes matching the "is_deleted IS FALSE/TRUE" filters, so a
+    # user's feed and trash are index scans that never touch the other set
+    __table_args__ = (
+        Index(
+            "ix_posters_username_active",
+            username,
+            postgresql_where=is_deleted.is_(False),
+        ),
+        Index(
+            "ix_posters_username_deleted",
+            username,
+            postgresql_where=is_deleted.is_(True),
+        ),
+    )
+
 
 class ArchivedPosterModel(Base):
     """Archived poster model for permanently deleted posts (metadata only)"""
@@ -78,7 +142,8 @@ class ArchivedPosterModel(Base):
     __tablename__ = "archived_posters"
 
     id = Column(Integer, primary_key=True, index=True)
-    original_id = Column(Integer, nullable=False, index=True)  # Original poster ID
+    # Original poster ID; a poster is archived at most once
+    original_id = Column(Integer, nullable=False, unique=True, index=True)
     username = Column(String(50), nullable=False, index=True)
     message = Column(Text, nullable=False)
     original_image_path = Column(
@@ -1,32 +1,41 @@
-from typing import List
+import asyncio
+from typing import Dict
 
 from fastapi import WebSocket
 
+# Upper bound on how long one slow client may hold up a broadcast
+SEND_TIMEOUT_SECONDS = 2.0
+
 
 class PostNotifier:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
-        self.usernames: dict = {}  # websocket -> username
+        # websocket -> username ("" for anonymous); the only connection registry
+        self.usernames: Dict[WebSocket, str] = {}
 
     async def connect(self, websocket: WebSocket, username: str = ""):
         await websocket.accept()
-        self.active_connections.append(websocket)
-        if username:
-            self.usernames[websocket] = username
+        self.usernames[websocket] = username
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        if websocket in self.usernames:
-            del self.usernames[websocket]
+        self.usernames.pop(websocket, None)
 
     async def broadcast_new_post(self, poster_username: str):
-        # Notify all except the poster
-        for ws in list(self.active_connections):
-            try:
-                if self.usernames.get(ws) != poster_username:
-                    await ws.send_json({"event": "new_post"})
-            except Exception:
+        # Notify all except the poster, concurrently so one slow client
+        # cannot delay everyone behind it
+        targets = [
+            ws for ws, username in self.usernames.items() if username != poster_username
+        ]
+        results = await asyncio.gather(
+            *(
+                asyncio.wait_for(
+                    ws.send_json({"event": "new_post"}), SEND_TIMEOUT_SECONDS
+                )
+                for ws in targets
+            ),
+            return_exceptions=True,
+        )
+        for ws, result in zip(targets, results):
+            if isinstance(result, Exception):
                 self.disconnect(ws)
 
 
@@ -2,15 +2,47 @@
 PostgreSQL Image Repository implementation
 """
 
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 
-from sqlalchemy import delete, select
+from sqlalchemy import (bindparam, delete, exists, insert, lambda_stmt,
+                        select)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...core.entities import Image
 from ...core.interfaces import ImageRepository
+from ..database import commit_or_flush, map_partitions
 from ..models import ImageModel
 
+# Rows fetched per round-trip from the server-side cursor on listings
+_YIELD_PER = 500
+
+
+def _user_images_query(username: str):
+    """A user's images, newest first"""
+    # Select plain columns so rows skip ORM identity-map bookkeeping
+    return (
+        select(
+            ImageModel.filename,
+            ImageModel.original_filename,
+            ImageModel.username,
+            ImageModel.file_path,
+            ImageModel.file_size,
+            ImageModel.content_type,
+            ImageModel.upload_date,
+        )
+        .where(ImageModel.username == username)
+        .order_by(ImageModel.upload_date.desc())
+        .execution_options(yield_per=_YIELD_PER)
+    )
+
+
+_GET_BY_FILENAME = lambda_stmt(
+    lambda: select(ImageModel).where(ImageModel.filename == bindparam("filename"))
+)
+_EXISTS_BY_FILENAME = lambda_stmt(
+    lambda: select(exists().where(ImageModel.filename == bindparam("filename")))
+)
+
 
 class PostgreSQLImageRepository(ImageRepository):
     """PostgreSQL image repository implementation"""
@@ -20,75 +52,69 @@ class PostgreSQLImageRepository(ImageRepository):
 
     async def create(self, image: Image) -> Image:
         """Create a new image record"""
-        db_image = ImageModel(
-            filename=image.filename,
-            original_filename=image.original_filename,
-            username=image.username,
-            file_path=image.file_path,
-            file_size=image.file_size,
-            content_type=image.content_type,
-            upload_date=image.upload_date,
-        )
-        self.session.add(db_image)
-        await self.session.commit()
-        await self.session.refresh(db_image)
-
-        return Image(
-            filename=db_image.filename,
-            original_filename=db_image.original_filename,
-            username=db_image.username,
-            file_path=db_image.file_path,
-            file_size=db_image.file_size,
-            content_type=db_image.content_type,
-            upload_date=db_image.upload_date,
+        # INSERT ... RETURNING saves the follow-up SELECT of a refresh()
+        result = await self.session.execute(
+            insert(ImageModel)
+            .values(
+                filename=image.filename,
+                original_filename=image.original_filename,
+                username=image.username,
+                file_path=image.file_path,
+                file_size=image.file_size,
+                content_type=image.content_type,
+                upload_date=image.upload_date,
+            )
+            .returning(ImageModel)
         )
+        db_image = result.scalar_one()
+        await commit_or_flush(self.session)
+
+        return db_image.to_entity()
 
     async def get_by_filename(self, filename: str) -> Optional[Image]:
         """Get image by filename"""
-        result = await self.session.execute(
-            select(ImageModel).where(ImageModel.filename == filename)
-        )
+        result = await self.session.execute(_GET_BY_FILENAME, {"filename": filename})
         db_image = result.scalar_one_or_none()
 
         if not db_image:
             return None
 
-        return Image(
-            filename=db_image.filename,
-            original_filename=db_image.original_filename,
-            username=db_image.username,
-            file_path=db_image.file_path,
-            file_size=db_image.file_size,
-            content_type=db_image.content_type,
-            upload_date=db_image.upload_date,
-        )
+        return db_image.to_entity()
 
-    async def get_by_username(self, username: str) -> List[Image]:
-        """Get all images for a user"""
+    async def exists(self, filename: str) -> bool:
+        """Check whether an image with this filename exists"""
         result = await self.session.execute(
-            select(ImageModel)
-            .where(ImageModel.username == username)
-            .order_by(ImageModel.upload_date.desc())
+            _EXISTS_BY_FILENAME, {"filename": filename}
         )
-        db_images = result.scalars().all()
-
-        return [
-            Image(
-                filename=img.filename,
-                original_filename=img.original_filename,
-                username=img.username,
-                file_path=img.file_path,
-                file_size=img.file_size,
-                content_type=img.content_type,
-                upload_date=img.upload_date,
-            )
-            for img in db_images
-        ]
+        return result.scalar()
+
+    async def get_by_username(self, username: str) -> List[Image]:
+        """Get all images for a user, newest first"""
+        result = await self.session.stream(_user_images_query(username))
+        return await map_partitions(result.mappings(), Image.model_validate)
+
+    async def iter_by_username(self, username: str) -> AsyncIterator[Image]:
+        """Stream all images for a user, newest first, via a server-side cursor"""
+        result = await self.session.stream(_user_images_query(username))
+        async for row in result.mappings():
+            yield Image(**row)
 
     async def delete(self, filename: str) -> bool:
         """Delete image"""
         result = await self.session.execute(
             delete(ImageModel).where(ImageModel.filename == filename)
         )
-        await self.session.commit()
+        await commit_or_flush(self.session)
         return result.rowcount > 0
+
+    async def delete_by_poster_ids(self, poster_ids: List[int]) -> List[str]:
+        """Delete images attached to the given posters, return their file paths"""
+        if not poster_ids:
+            return []
+        result = await self.session.execute(
+            delete(ImageModel)
+            .where(ImageModel.poster_id.in_(poster_ids))
+            .returning(ImageModel.file_path)
+        )
+        await commit_or_flush(self.session)
+        return list(result.scalars().all())
@@ -2,15 +2,39 @@
 PostgreSQL Poster Repository implementations
 """
 
-from datetime import datetime, timezone
+from typing import Dict, List
 
-from sqlalchemy import select
+from sqlalchemy import (String, bindparam, cast, delete, func, insert,
+                        lambda_stmt, select, update)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...core.entities import ArchivedPoster, Poster
 from ...core.interfaces import ArchivedPosterRepository, PosterRepository
+from ..database import commit_or_flush, map_partitions
 from ..models import ArchivedPosterModel, ImageModel, PosterModel
 
+# Rows fetched per round-trip when streaming list queries from a server-side
+# cursor, so large result sets are never buffered whole by the driver
+_YIELD_PER = 500
+
+# Plain columns for read-only poster listings, so rows skip ORM hydration
+_POSTER_COLUMNS = (
+    PosterModel.id,
+    PosterModel.username,
+    PosterModel.message,
+    PosterModel.created_at,
+    PosterModel.privacy,
+    PosterModel.is_deleted,
+    PosterModel.deleted_at,
+)
+
+# Hot lookups are built once with a fixed statement cache key
+_GET_ARCHIVED_BY_ORIGINAL_ID = lambda_stmt(
+    lambda: select(ArchivedPosterModel).where(
+        ArchivedPosterModel.original_id == bindparam("original_id")
+    )
+)
+
 
 class PostgreSQLArchivedPosterRepository(ArchivedPosterRepository):
     """PostgreSQL archived poster repository implementation"""
@@ -19,39 +43,58 @@ class PostgreSQLArchivedPosterRepository(ArchivedPosterRepository):
         self.session = session
 
     async def create(self, archived_poster: ArchivedPoster) -> ArchivedPoster:
-        db_archived = ArchivedPosterModel(
-            original_id=archived_poster.original_id,
-            username=archived_poster.username,
-            message=archived_poster.message,
-            original_image_path=archived_poster.original_image_path,
-            image_filename=archived_poster.image_filename,
-            created_at=archived_poster.created_at,
-            deleted_at=archived_poster.deleted_at,
-            archived_at=archived_poster.archived_at,
-            privacy=archived_poster.privacy,
-        )
-        self.session.add(db_archived)
-        await self.session.commit()
-        await self.session.refresh(db_archived)
-        return ArchivedPoster.from_orm(db_archived)
+        result = await self.session.execute(
+            insert(ArchivedPosterModel)
+            .values(
+                original_id=archived_poster.original_id,
+                username=archived_poster.username,
+                message=archived_poster.message,
+                original_image_path=archived_poster.original_image_path,
+                image_filename=archived_poster.image_filename,
+                created_at=archived_poster.created_at,
+                deleted_at=archived_poster.deleted_at,
+                archived_at=archived_poster.archived_at,
+                privacy=archived_poster.privacy,
+            )
+            .returning(ArchivedPosterModel)
+        )
+        db_archived = result.scalar_one()
+        await commit_or_flush(self.session)
+        return ArchivedPoster.model_validate(db_archived)
 
     async def get_by_username(self, username: str) -> list:
-        result = await self.session.execute(
-            select(ArchivedPosterModel).where(ArchivedPosterModel.username == username)
+        # Read-only listing: plain columns skip ORM instance construction
+        result = await self.session.stream(
+            select(*ArchivedPosterModel.__table__.c)
+            .where(ArchivedPosterModel.username == username)
+            .execution_options(yield_per=_YIELD_PER)
         )
-        archived = result.scalars().all()
-        return [ArchivedPoster.from_orm(a) for a in archived]
+        return await map_partitions(result.mappings(), ArchivedPoster.model_validate)
 
     async def get_by_original_id(self, original_id: int) -> ArchivedPoster:
         result = await self.session.execute(
-            select(ArchivedPosterModel).where(
-                ArchivedPosterModel.original_id == original_id
-            )
+            _GET_ARCHIVED_BY_ORIGINAL_ID, {"original_id": original_id}
         )
         archived = result.scalar_one_or_none()
         if not archived:
             return None
-        return ArchivedPoster.from_orm(archived)
+        return ArchivedPoster.model_validate(archived)
+
+    async def get_by_original_ids(
+        self, original_ids: List[int]
+    ) -> Dict[int, ArchivedPoster]:
+        # One round-trip for any number of posters; prefer this over calling
+        # get_by_original_id in a loop
+        if not original_ids:
+            return {}
+        result = await self.session.execute(
+            select(ArchivedPosterModel).where(
+                ArchivedPosterModel.original_id.in_(original_ids)
+            )
+        )
+        return {
+            a.original_id: ArchivedPoster.model_validate(a) for a in result.scalars()
+        }
 
 
 class PostgreSQLPosterRepository(PosterRepository):
@@ -61,170 +104,217 @@ class PostgreSQLPosterRepository(PosterRepository):
         self.session = session
 
     async def create(self, poster: Poster) -> Poster:
-        db_poster = PosterModel(
-            username=poster.username,
-            message=poster.message,
-            privacy=poster.privacy,
-            is_deleted=poster.is_deleted,
-            deleted_at=poster.deleted_at,
-        )
-        self.session.add(db_poster)
-        await self.session.commit()
-        await self.session.refresh(db_poster)
-        return Poster.from_orm(db_poster)
+        # INSERT ... RETURNING fills id/created_at without a refresh() SELECT
+        result = await self.session.execute(
+            insert(PosterModel)
+            .values(
+                username=poster.username,
+                message=poster.message,
+                privacy=poster.privacy,
+                is_deleted=poster.is_deleted,
+                deleted_at=poster.deleted_at,
+            )
+            .returning(PosterModel)
+        )
+        db_poster = result.scalar_one()
+        await commit_or_flush(self.session)
+        return Poster.model_validate(db_poster)
 
     async def get_by_id(self, poster_id: int) -> Poster:
         db_poster = await self.session.get(PosterModel, poster_id)
         if not db_poster:
             return None
-        return Poster.from_orm(db_poster)
+        return Poster.model_validate(db_poster)
 
     async def get_by_username(self, username: str) -> list:
-        result = await self.session.execute(
-            select(PosterModel).where(
-                PosterModel.username == username, PosterModel.is_deleted.is_(False)
-            )
+        result = await self.session.stream(
+            select(*_POSTER_COLUMNS)
+            .where(PosterModel.username == username, PosterModel.is_deleted.is_(False))
+            .execution_options(yield_per=_YIELD_PER)
         )
-        posters = result.scalars().all()
-        return [Poster.from_orm(p) for p in posters]
+        return await map_partitions(result.mappings(), Poster.model_validate)
 
     async def update(self, poster: Poster) -> Poster:
-        db_poster = await self.session.get(PosterModel, poster.id)
+        # Single UPDATE ... RETURNING instead of SELECT, mutate, refresh
+        result = await self.session.execute(
+            update(PosterModel)
+            .where(PosterModel.id == poster.id)
+            .values(
+                message=poster.message,
+                privacy=poster.privacy,
+                is_deleted=poster.is_deleted,
+                deleted_at=poster.deleted_at,
+            )
+            .returning(PosterModel)
+            .execution_options(populate_existing=True)
+        )
+        db_poster = result.scalar_one_or_none()
         if not db_poster:
             raise ValueError("Poster not found")
-        db_poster.message = poster.message
-        db_poster.privacy = poster.privacy
-        db_poster.is_deleted = poster.is_deleted
-        db_poster.deleted_at = poster.deleted_at
-        await self.session.commit()
-        await self.session.refresh(db_poster)
-        return Poster.from_orm(db_poster)
+        await commit_or_flush(self.session)
+        return Poster.model_validate(db_poster)
 
     async def delete(self, poster_id: int) -> bool:
-        # Soft delete: set is_deleted and deleted_at
-        db_poster = await self.session.get(PosterModel, poster_id)
-        if not db_poster:
-            return False
-        db_poster.is_deleted = True
-        db_poster.deleted_at = datetime.now(timezone.utc)
-        await self.session.commit()
-        return True
+        # Soft delete: set is_deleted and deleted_at in a single UPDATE
+        result = await self.session.execute(
+            update(PosterModel)
+            .where(PosterModel.id == poster_id)
+            .values(is_deleted=True, deleted_at=func.now())
+        )
+        await commit_or_flush(self.session)
+        return result.rowcount > 0
 
     async def get_deleted(self, username: str) -> list:
-        result = await self.session.execute(
-            select(PosterModel).where(
-                PosterModel.username == username, PosterModel.is_deleted.is_(True)
-            )
+        result = await self.session.stream(
+            select(*_POSTER_COLUMNS)
+            .where(PosterModel.username == username, PosterModel.is_deleted.is_(True))
+            .execution_options(yield_per=_YIELD_PER)
         )
-        posters = result.scalars().all()
-        return [Poster.from_orm(p) for p in posters]
+        return await map_partitions(result.mappings(), Poster.model_validate)
 
     async def hard_delete(self, poster_id: int) -> bool:
-        db_poster = await self.session.get(PosterModel, poster_id)
-        if not db_poster:
-            return False
-        await self.session.delete(db_poster)
-        await self.session.commit()
-        return True
+        # Single DELETE instead of loading the row first
+        result = await self.session.execute(
+            delete(PosterModel).where(PosterModel.id == poster_id)
+        )
+        await commit_or_flush(self.session)
+        return result.rowcount > 0
 
     async def hard_delete_all_deleted(self, username: str) -> int:
         result = await self.session.execute(
-            select(PosterModel).where(
+            delete(PosterModel).where(
                 PosterModel.username == username, PosterModel.is_deleted.is_(True)
             )
         )
-        posters = result.scalars().all()
-        count = 0
-        for p in posters:
-            await self.session.delete(p)
-            count += 1
-        await self.session.commit()
-        return count
+        await commit_or_flush(self.session)
+        return result.rowcount
 
     async def archive_and_hard_delete(
         self, poster_id: int, archived_repo: ArchivedPosterRepository
     ) -> ArchivedPoster:
-        """Archive poster metadata then hard delete"""
-        db_poster = await self.session.get(PosterModel, poster_id)
-        if not db_poster:
-            return None
-
-        # Create archived record
-        # Get the first image associated with this poster for archival
-        image_result = await self.session.execute(
-            select(ImageModel).where(ImageModel.poster_id == poster_id).limit(1)
+        """Archive poster metadata then hard delete
+
+        One statement: the DELETE ... RETURNING feeds the archive INSERT, so
+        both happen atomically in a single round-trip; ``archived_repo`` is not
+        needed.
+        """
+        deleted = (
+            delete(PosterModel)
+            .where(PosterModel.id == poster_id)
+            .returning(
+                PosterModel.id,
+                PosterModel.username,
+                PosterModel.message,
+                PosterModel.created_at,
+                PosterModel.deleted_at,
+                PosterModel.privacy,
+            )
+            .cte("deleted")
         )
-        first_image = image_result.scalar_one_or_none()
-
-        original_image_path = first_image.file_path if first_image else ""
-        image_filename = first_image.filename if first_image else ""
-
-        archived_poster = ArchivedPoster(
-            original_id=db_poster.id,
-            username=db_poster.username,
-            message=db_poster.message,
-            original_image_path=original_image_path,
-            image_filename=image_filename,
-            created_at=db_poster.created_at,
-            deleted_at=db_poster.deleted_at,
-            archived_at=datetime.now(timezone.utc),
-            privacy=db_poster.privacy,
+        # The deleted poster joined to its first image (if any)
+        to_archive = (
+            select(
+                deleted.c.id,
+                deleted.c.username,
+                deleted.c.message,
+                func.coalesce(ImageModel.file_path, ""),
+                func.coalesce(ImageModel.filename, ""),
+                deleted.c.created_at,
+                deleted.c.deleted_at,
+                func.now(),
+                cast(deleted.c.privacy, String),
+            )
+            .outerjoin(ImageModel, ImageModel.poster_id == deleted.c.id)
+            .order_by(ImageModel.upload_date)
+            .limit(1)
         )
-        archived_result = await archived_repo.create(archived_poster)
-
-        # Hard delete
-        await self.session.delete(db_poster)
-        await self.session.commit()
-        return archived_result
+        result = await self.session.execute(
+            insert(ArchivedPosterModel)
+            .from_select(
+                [
+                    ArchivedPosterModel.original_id,
+                    ArchivedPosterModel.username,
+                    ArchivedPosterModel.message,
+                    ArchivedPosterModel.original_image_path,
+                    ArchivedPosterModel.image_filename,
+                    ArchivedPosterModel.created_at,
+                    ArchivedPosterModel.deleted_at,
+                    ArchivedPosterModel.archived_at,
+                    ArchivedPosterModel.privacy,
+                ],
+                to_archive,
+            )
+            .returning(ArchivedPosterModel)
+        )
+        db_archived = result.scalar_one_or_none()
+        await commit_or_flush(self.session)
+        if not db_archived:
+            return None
+        return ArchivedPoster.model_validate(db_archived)
 
     async def archive_and_hard_delete_all_deleted(
         self, username: str, archived_repo: ArchivedPosterRepository
-    ) -> int:
-        """Archive all deleted posters metadata then hard delete"""
+    ) -> List[int]:
+        """Archive all deleted posters metadata then hard delete, return their ids
+
+        Runs as one INSERT ... SELECT plus one DELETE in a single transaction
+        instead of a round-trip per poster; ``archived_repo`` is not needed.
+        """
+        # One row per deleted poster, joined to its first image (if any)
+        to_archive = (
+            select(
+                PosterModel.id,
+                PosterModel.username,
+                PosterModel.message,
+                func.coalesce(ImageModel.file_path, ""),
+                func.coalesce(ImageModel.filename, ""),
+                PosterModel.created_at,
+                PosterModel.deleted_at,
+                func.now(),
+                cast(PosterModel.privacy, String),
+            )
+            .outerjoin(ImageModel, ImageModel.poster_id == PosterModel.id)
+            .where(PosterModel.username == username, PosterModel.is_deleted.is_(True))
+            .distinct(PosterModel.id)
+            .order_by(PosterModel.id, ImageModel.upload_date)
+        )
         result = await self.session.execute(
-            select(PosterModel).where(
-                PosterModel.username == username, PosterModel.is_deleted.is_(True)
+            insert(ArchivedPosterModel)
+            .from_select(
+                [
+                    ArchivedPosterModel.original_id,
+                    ArchivedPosterModel.username,
+                    ArchivedPosterModel.message,
+                    ArchivedPosterModel.original_image_path,
+                    ArchivedPosterModel.image_filename,
+                    ArchivedPosterModel.created_at,
+                    ArchivedPosterModel.deleted_at,
+                    ArchivedPosterModel.archived_at,
+                    ArchivedPosterModel.privacy,
+                ],
+                to_archive,
             )
+            .returning(ArchivedPosterModel.original_id)
         )
-        posters = result.scalars().all()
-        count = 0
+        archived_ids = result.scalars().all()
 
-        for p in posters:
-            # Get the first image associated with this poster for archival
-            image_result = await self.session.execute(
-                select(ImageModel).where(ImageModel.poster_id == p.id).limit(1)
-            )
-            first_image = image_result.scalar_one_or_none()
-
-            original_image_path = first_image.file_path if first_image else ""
-            image_filename = first_image.filename if first_image else ""
-
-            # Create archived record
-            archived_poster = ArchivedPoster(
-                original_id=p.id,
-                username=p.username,
-                message=p.message,
-                original_image_path=original_image_path,
-                image_filename=image_filename,
-                created_at=p.created_at,
-                deleted_at=p.deleted_at,
-                archived_at=datetime.now(timezone.utc),
-                privacy=p.privacy,
+        # Delete exactly the posters that were archived
+        if archived_ids:
+            await self.session.execute(
+                delete(PosterModel).where(PosterModel.id.in_(archived_ids))
             )
-            await archived_repo.create(archived_poster)
-
-            # Hard delete
-            await self.session.delete(p)
-            count += 1
-
-        await self.session.commit()
-        return count
+        await commit_or_flush(self.session)
+        return list(archived_ids)
 
     async def restore(self, poster_id: int, username: str) -> bool:
-        db_poster = await self.session.get(PosterModel, poster_id)
-        if not db_poster or db_poster.username != username or not db_poster.is_deleted:
-            return False
-        db_poster.is_deleted = False
-        db_poster.deleted_at = None
-        await self.session.commit()
-        return True
+        result = await self.session.execute(
+            update(PosterModel)
+            .where(
+                PosterModel.id == poster_id,
+                PosterModel.username == username,
+                PosterModel.is_deleted.is_(True),
+            )
+            .values(is_deleted=False, deleted_at=None)
+        )
+        await commit_or_flush(self.session)
+        return result.rowcount > 0
@@ -3,14 +3,29 @@ PostgreSQL Token Repository implementations
 """
 
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Tuple
 
-from sqlalchemy import delete, select
+from sqlalchemy import (DateTime, LargeBinary, bindparam, delete, func,
+                        lambda_stmt, literal, select)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...core.interfaces import RefreshTokenRepository, TokenRepository
+from ...core.security import hash_token
+from ..database import commit_or_flush
 from ..models import RefreshTokenModel
 
+# Rows removed per DELETE when purging expired tokens, to keep transactions short
+CLEANUP_BATCH_SIZE = 10_000
+
+
+# Hot lookups are built once with a fixed statement cache key
+_GET_BY_HASH = lambda_stmt(
+    lambda: select(RefreshTokenModel).where(
+        RefreshTokenModel.token_hash == bindparam("token_hash")
+    )
+)
+
 
 class PostgreSQLTokenRepository(TokenRepository):
     """PostgreSQL token repository implementation"""
@@ -20,44 +35,64 @@ class PostgreSQLTokenRepository(TokenRepository):
 
     async def store_refresh_token(self, token: str, username: str) -> bool:
         """Store refresh token"""
-        # Set expiration to 7 days from now
-        expires_at = datetime.utcnow() + timedelta(days=7)
-
-        db_token = RefreshTokenModel(
-            token=token, username=username, expires_at=expires_at
-        )
-        self.session.add(db_token)
-        await self.session.commit()
+        await self.store_refresh_tokens([(token, username)])
         return True
 
-    async def get_username_by_refresh_token(self, token: str) -> Optional[str]:
-        """Get username by refresh token"""
+    async def store_refresh_tokens(self, tokens: List[Tuple[str, str]]) -> int:
+        """Store refresh tokens in one INSERT, skipping ones already stored"""
+        if not tokens:
+            return 0
+        # Set expiration to 7 days from now, using the database clock
+        expires_at = func.now() + timedelta(days=7)
         result = await self.session.execute(
-            select(RefreshTokenModel)
-            .where(RefreshTokenModel.token == token)
-            .where(RefreshTokenModel.expires_at > datetime.utcnow())
+            insert(RefreshTokenModel)
+            .values(
+                [
+                    {
+                        "token_hash": hash_token(token),
+                        "username": username,
+                        "expires_at": expires_at,
+                    }
+                    for token, username in tokens
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["token_hash"])
         )
-        db_token = result.scalar_one_or_none()
-
-        return db_token.username if db_token else None
+        await commit_or_flush(self.session)
+        return result.rowcount
 
     async def delete_refresh_token(self, token: str) -> bool:
         """Delete refresh token"""
         result = await self.session.execute(
-            delete(RefreshTokenModel).where(RefreshTokenModel.token == token)
+            delete(RefreshTokenModel).where(
+                RefreshTokenModel.token_hash == hash_token(token)
+            )
         )
-        await self.session.commit()
+        await commit_or_flush(self.session)
         return result.rowcount > 0
 
-    async def cleanup_expired_tokens(self) -> int:
-        """Clean up expired refresh tokens"""
-        result = await self.session.execute(
-            delete(RefreshTokenModel).where(
-                RefreshTokenModel.expires_at <= datetime.utcnow()
-            )
+    async def cleanup_expired_tokens(
+        self, batch_size: int = CLEANUP_BATCH_SIZE
+    ) -> int:
+        """Clean up expired refresh tokens in bounded batches"""
+        # Oldest first, so each batch is a range scan of ix_refresh_tokens_expires_at
+        expired = (
+            select(RefreshTokenModel.token_hash)
+            .where(RefreshTokenModel.expires_at <= func.now())
+            .order_by(RefreshTokenModel.expires_at)
+            .limit(batch_size)
         )
-        await self.session.commit()
-        return result.rowcount
+        total = 0
+        while True:
+            result = await self.session.execute(
+                delete(RefreshTokenModel).where(
+                    RefreshTokenModel.token_hash.in_(expired.scalar_subquery())
+                )
+            )
+            await self.session.commit()
+            total += result.rowcount
+            if result.rowcount < batch_size:
+                return total
 
 
 class PostgreSQLRefreshTokenRepository(RefreshTokenRepository):
@@ -66,26 +101,65 @@ class PostgreSQLRefreshTokenRepository(RefreshTokenRepository):
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def create(self, token: str, username: str, expires_at: datetime) -> bool:
+    async def create(
+        self, token_hash: bytes, username: str, expires_at: datetime
+    ) -> bool:
         """Create a new refresh token"""
-        db_token = RefreshTokenModel(
-            token=token, username=username, expires_at=expires_at
+        await self.session.execute(
+            insert(RefreshTokenModel)
+            .values(token_hash=token_hash, username=username, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=["token_hash"])
         )
-        self.session.add(db_token)
-        await self.session.commit()
+        await commit_or_flush(self.session)
         return True
 
-    async def get_by_token(self, token: str):
-        """Get refresh token by token string"""
+    async def get_by_hash(self, token_hash: bytes):
+        """Get refresh token by SHA-256 digest"""
         result = await self.session.execute(
-            select(RefreshTokenModel).where(RefreshTokenModel.token == token)
+            _GET_BY_HASH, {"token_hash": token_hash}
         )
         return result.scalar_one_or_none()
 
-    async def delete_by_token(self, token: str) -> bool:
-        """Delete refresh token by token string"""
+    async def delete_by_hash(self, token_hash: bytes) -> bool:
+        """Delete refresh token by SHA-256 digest"""
         result = await self.session.execute(
-            delete(RefreshTokenModel).where(RefreshTokenModel.token == token)
+            delete(RefreshTokenModel).where(RefreshTokenModel.token_hash == token_hash)
+        )
+        await commit_or_flush(self.session)
+        return result.rowcount > 0
+
+    async def rotate(
+        self,
+        old_token_hash: bytes,
+        new_token_hash: bytes,
+        username: str,
+        expires_at: datetime,
+    ) -> bool:
+        """Replace a refresh token with a new one in a single statement
+
+        The new token is only inserted if the old one was deleted, so
+        concurrent refreshes with the same token cannot both succeed.
+        """
+        revoked = (
+            delete(RefreshTokenModel)
+            .where(
+                RefreshTokenModel.token_hash == old_token_hash,
+                RefreshTokenModel.username == username,
+            )
+            .returning(RefreshTokenModel.username)
+            .cte("revoked")
+        )
+        result = await self.session.execute(
+            insert(RefreshTokenModel)
+            .from_select(
+                ["token_hash", "username", "expires_at"],
+                select(
+                    literal(new_token_hash, LargeBinary),
+                    revoked.c.username,
+                    literal(expires_at, DateTime(timezone=True)),
+                ),
+            )
+            .on_conflict_do_nothing(index_elements=["token_hash"])
         )
-        await self.session.commit()
+        await commit_or_flush(self.session)
         return result.rowcount > 0
@@ -2,16 +2,107 @@
 PostgreSQL User Repository implementation
 """
 
-from datetime import datetime
-from typing import List, Optional
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
 
-from sqlalchemy import delete, select
+from cachetools import TTLCache
+from sqlalchemy import bindparam, delete, func, lambda_stmt, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...core.entities import User, UserStatus
 from ...core.interfaces import UserRepository
+from ..database import after_commit, commit_or_flush, map_partitions
 from ..models import UserModel
 
+# Rows fetched per round-trip when streaming list queries from a server-side
+# cursor, so large result sets are never buffered whole by the driver
+_YIELD_PER = 500
+
+# Plain columns for read-only queries, so rows skip ORM identity-map
+# bookkeeping and go straight into the domain entity
+_USER_COLUMNS = (
+    UserModel.username,
+    UserModel.email,
+    UserModel.hashed_password,
+    UserModel.is_active,
+    UserModel.is_admin,
+    UserModel.status,
+    UserModel.created_at,
+    UserModel.updated_at,
+    UserModel.approved_at,
+    UserModel.approved_by,
+)
+
+# Hot lookups are built once; lambda statements have a fixed cache key, so
+# SQLAlchemy skips rebuilding it from the statement on every call
+_GET_BY_USERNAME = lambda_stmt(
+    lambda: select(*_USER_COLUMNS).where(UserModel.username == bindparam("username"))
+)
+_GET_BY_EMAIL = lambda_stmt(
+    lambda: select(*_USER_COLUMNS).where(UserModel.email == bindparam("email"))
+)
+
+# Identity lookups run on nearly every authenticated request but users change
+# rarely. Repositories are built per request, so the cache is module level.
+# Keys are "username:<name>" / "email:<addr>"; misses are never cached.
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+# One loader per key at a time so a cold key doesn't stampede the database.
+# A lock is dropped once no caller holds or waits on it.
+_user_locks: Dict[str, asyncio.Lock] = {}
+_user_lock_users: Dict[str, int] = {}
+
+
+def _invalidate_user(username: str, email: Optional[str] = None) -> None:
+    """Drop every cache entry for a user"""
+    cached = _user_cache.pop(f"username:{username}", None)
+    if cached is not None:
+        _user_cache.pop(f"email:{cached.email}", None)
+    if email is not None:
+        _user_cache.pop(f"email:{email}", None)
+
+
+async def _cached_user(
+    key: str, load: Callable[[], Awaitable[Optional[User]]]
+) -> Optional[User]:
+    """Return a copy of the cached user for ``key``, loading it on a miss"""
+    user = _user_cache.get(key)
+    if user is None:
+        lock = _user_locks.setdefault(key, asyncio.Lock())
+        _user_lock_users[key] = _user_lock_users.get(key, 0) + 1
+        try:
+            async with lock:
+                user = _user_cache.get(key)
+                if user is None:
+                    user = await load()
+                    if user is None:
+                        return None
+                    _user_cache[f"username:{user.username}"] = user
+                    _user_cache[f"email:{user.email}"] = user
+        finally:
+            _user_lock_users[key] -= 1
+            if not _user_lock_users[key]:
+                del _user_lock_users[key]
+                del _user_locks[key]
+    # Callers mutate the entity (e.g. approve_user), never hand out the original
+    return user.model_copy()
+
+
+def _user_values(user: User) -> dict:
+    """Column values for inserting a user"""
+    return {
+        "username": user.username,
+        "email": user.email,
+        "hashed_password": user.hashed_password,
+        "is_active": user.is_active,
+        "is_admin": user.is_admin,
+        "status": user.status.value,
+        "created_at": user.created_at,
+        "updated_at": user.updated_at,
+        "approved_at": user.approved_at,
+        "approved_by": user.approved_by,
+    }
+
 
 class PostgreSQLUserRepository(UserRepository):
     """PostgreSQL user repository implementation"""
@@ -21,143 +112,100 @@ class PostgreSQLUserRepository(UserRepository):
 
     async def create(self, user: User) -> User:
         """Create a new user"""
-        db_user = UserModel(
-            username=user.username,
-            email=user.email,
-            hashed_password=user.hashed_password,
-            is_active=user.is_active,
-            is_admin=user.is_admin,
-            status=user.status.value,
-            created_at=user.created_at,
-            updated_at=user.updated_at,
-            approved_at=user.approved_at,
-            approved_by=user.approved_by,
-        )
-        self.session.add(db_user)
-        await self.session.commit()
-        await self.session.refresh(db_user)
-
-        return User(
-            username=db_user.username,
-            email=db_user.email,
-            hashed_password=db_user.hashed_password,
-            is_active=db_user.is_active,
-            is_admin=db_user.is_admin,
-            status=UserStatus(db_user.status),
-            created_at=db_user.created_at,
-            updated_at=db_user.updated_at,
-            approved_at=db_user.approved_at,
-            approved_by=db_user.approved_by,
+        # INSERT ... RETURNING saves the follow-up SELECT of a refresh()
+        result = await self.session.execute(
+            insert(UserModel).values(_user_values(user)).returning(UserModel)
         )
+        db_user = result.scalar_one()
+        await commit_or_flush(self.session)
 
-    async def get_by_username(self, username: str) -> Optional[User]:
-        """Get user by username"""
+        return db_user.to_entity()
+
+    async def create_if_absent(self, user: User) -> Optional[User]:
+        """Create a user unless the username or email is already taken"""
+        # The unique constraints decide in one round-trip, so there is no
+        # check-then-insert window for a concurrent create to slip through
         result = await self.session.execute(
-            select(UserModel).where(UserModel.username == username)
+            insert(UserModel)
+            .values(_user_values(user))
+            .on_conflict_do_nothing()
+            .returning(UserModel)
         )
         db_user = result.scalar_one_or_none()
+        await commit_or_flush(self.session)
 
         if not db_user:
             return None
 
-        return User(
-            username=db_user.username,
-            email=db_user.email,
-            hashed_password=db_user.hashed_password,
-            is_active=db_user.is_active,
-            is_admin=db_user.is_admin,
-            status=UserStatus(db_user.status),
-            created_at=db_user.created_at,
-            updated_at=db_user.updated_at,
-            approved_at=db_user.approved_at,
-            approved_by=db_user.approved_by,
+        return db_user.to_entity()
+
+    async def get_by_username(self, username: str) -> Optional[User]:
+        """Get user by username"""
+        return await _cached_user(
+            f"username:{username}",
+            lambda: self._load_one(_GET_BY_USERNAME, {"username": username}),
         )
 
     async def get_by_email(self, email: str) -> Optional[User]:
         """Get user by email"""
-        result = await self.session.execute(
-            select(UserModel).where(UserModel.email == email)
+        return await _cached_user(
+            f"email:{email}", lambda: self._load_one(_GET_BY_EMAIL, {"email": email})
         )
-        db_user = result.scalar_one_or_none()
 
-        if not db_user:
+    async def _load_one(self, statement, params: dict) -> Optional[User]:
+        """Load a single user from the database"""
+        result = await self.session.execute(statement, params)
+        row = result.mappings().one_or_none()
+
+        if not row:
             return None
 
-        return User(
-            username=db_user.username,
-            email=db_user.email,
-            hashed_password=db_user.hashed_password,
-            is_active=db_user.is_active,
-            is_admin=db_user.is_admin,
-            status=UserStatus(db_user.status),
-            created_at=db_user.created_at,
-            updated_at=db_user.updated_at,
-            approved_at=db_user.approved_at,
-            approved_by=db_user.approved_by,
-        )
+        return User.model_validate(row)
 
     async def get_by_status(self, status: UserStatus) -> List[User]:
-        """Get users by status"""
-        result = await self.session.execute(
-            select(UserModel).where(UserModel.status == status.value)
+        """Get users by status, oldest first"""
+        result = await self.session.stream(
+            select(*_USER_COLUMNS)
+            .where(UserModel.status == status.value)
+            .order_by(UserModel.created_at)
+            .execution_options(yield_per=_YIELD_PER)
         )
-        db_users = result.scalars().all()
+        return await map_partitions(result.mappings(), User.model_validate)
 
-        return [
-            User(
-                username=user.username,
+    async def update(self, user: User) -> User:
+        """Update user"""
+        # Single UPDATE ... RETURNING instead of SELECT, mutate, refresh
+        result = await self.session.execute(
+            update(UserModel)
+            .where(UserModel.username == user.username)
+            .values(
                 email=user.email,
                 hashed_password=user.hashed_password,
                 is_active=user.is_active,
                 is_admin=user.is_admin,
-                status=UserStatus(user.status),
-                created_at=user.created_at,
-                updated_at=user.updated_at,
+                status=user.status.value,
+                updated_at=func.now(),
                 approved_at=user.approved_at,
                 approved_by=user.approved_by,
             )
-            for user in db_users
-        ]
-
-    async def update(self, user: User) -> User:
-        """Update user"""
-        result = await self.session.execute(
-            select(UserModel).where(UserModel.username == user.username)
+            .returning(UserModel)
+            .execution_options(populate_existing=True)
         )
         db_user = result.scalar_one_or_none()
 
         if not db_user:
             raise ValueError("User not found")
 
-        db_user.email = user.email
-        db_user.hashed_password = user.hashed_password
-        db_user.is_active = user.is_active
-        db_user.is_admin = user.is_admin
-        db_user.status = user.status.value
-        db_user.updated_at = datetime.utcnow()
-        db_user.approved_at = user.approved_at
-        db_user.approved_by = user.approved_by
-
-        await self.session.commit()
-        await self.session.refresh(db_user)
-
-        return User(
-            username=db_user.username,
-            email=db_user.email,
-            hashed_password=db_user.hashed_password,
-            is_active=db_user.is_active,
-            is_admin=db_user.is_admin,
-            status=UserStatus(db_user.status),
-            created_at=db_user.created_at,
-            updated_at=db_user.updated_at,
-            approved_at=db_user.approved_at,
-            approved_by=db_user.approved_by,
-        )
+        await commit_or_flush(self.session)
+        after_commit(self.session, lambda: _invalidate_user(user.username, user.email))
+
+        return db_user.to_entity()
 
     async def delete(self, username: str) -> bool:
         """Delete user"""
         result = await self.session.execute(
             delete(UserModel).where(UserModel.username == username)
         )
-        await self.session.commit()
+        await commit_or_flush(self.session)
+        after_commit(self.session, lambda: _invalidate_user(username))
         return result.rowcount > 0
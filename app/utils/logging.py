@@ -8,6 +8,9 @@ from typing import Optional
 
 from loguru import logger
 
+# Records are emitted from frames inside the logging module until the caller
+_LOGGING_FILE = logging.__file__
+
 
 def setup_logging(
     level: str = "INFO",
@@ -49,6 +52,9 @@ def setup_logging(
             rotation=rotation,
             retention=retention,
             compression="zip",
+            # Writes, rotation and zip compression run on loguru's worker
+            # thread instead of stalling the caller (and the event loop)
+            enqueue=True,
         )
 
     # Intercept standard logging
@@ -59,8 +65,9 @@ def setup_logging(
             except ValueError:
                 level = record.levelno
 
-            frame, depth = logging.currentframe(), 2
-            while frame.f_code.co_filename == logging.__file__:
+            # Step out of emit() and the logging module to the real caller
+            frame, depth = logging.currentframe().f_back, 1
+            while frame is not None and frame.f_code.co_filename == _LOGGING_FILE:
                 frame = frame.f_back
                 depth += 1
 
@@ -68,8 +75,13 @@ def setup_logging(
                 level, record.getMessage()
             )
 
-    # Replace standard logging handlers
-    logging.basicConfig(handlers=[InterceptHandler()], level=0, force=True)
+    # Replace standard logging handlers. Filtering at the configured level
+    # drops records in the stdlib before they are formatted and forwarded.
+    logging.basicConfig(
+        handlers=[InterceptHandler()],
+        level=logger.level(level).no,
+        force=True,
+    )
 
     # Set specific loggers to use loguru
     for name in logging.root.manager.loggerDict:
@@ -2,7 +2,12 @@
 File storage utilities
 """
 
+import asyncio
 import os
+from typing import AsyncIterator, Union
+
+import aiofiles
+import aiofiles.os
 
 from ..core.interfaces import FileStorage
 
@@ -19,29 +24,39 @@ class LocalFileStorage(FileStorage):
         if not os.path.exists(self.upload_dir):
             os.makedirs(self.upload_dir)
 
-    async def save_file(self, file_content: bytes, filename: str) -> str:
-        """Save file and return file path"""
+    async def save_file(
+        self, file_content: Union[bytes, AsyncIterator[bytes]], filename: str
+    ) -> str:
+        """Save file and return file path
+
+        ``file_content`` may be an async iterator of chunks, which are written
+        as they arrive instead of being buffered in memory first.
+        """
         file_path = os.path.join(self.upload_dir, filename)
 
         # Ensure directory exists
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        directory = os.path.dirname(file_path)
+        await asyncio.to_thread(os.makedirs, directory, exist_ok=True)
 
         # Write file
-        with open(file_path, "wb") as f:
-            f.write(file_content)
+        async with aiofiles.open(file_path, "wb") as f:
+            if isinstance(file_content, bytes):
+                await f.write(file_content)
+            else:
+                async for chunk in file_content:
+                    await f.write(chunk)
 
         return file_path
 
     async def delete_file(self, file_path: str) -> bool:
         """Delete file"""
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                return True
-            return False
+            await aiofiles.os.remove(file_path)
+            return True
         except Exception:
+            # Missing files count as already deleted
             return False
 
     async def file_exists(self, file_path: str) -> bool:
         """Check if file exists"""
-        return os.path.exists(file_path)
+        return await aiofiles.os.path.exists(file_path)
@@ -70,11 +70,17 @@ def check_env_variables():
     issues = []
     warnings = []
 
+    # Read the environment once; later checks reuse these values
+    env = dict(os.environ)
+    values = {
+        var: env.get(var, config["default"]) for var, config in required_vars.items()
+    }
+
     print("📋 Required Variables:")
     print("-" * 30)
 
     for var, config in required_vars.items():
-        value = os.getenv(var, config["default"])
+        value = values[var]
         status = "✅" if value != config["default"] else "❌"
         print(f"{status} {var}: {value}")
 
@@ -88,7 +94,7 @@ def check_env_variables():
     print("-" * 30)
 
     for var, default in optional_vars.items():
-        value = os.getenv(var, default)
+        value = env.get(var, default)
         status = "✅" if value != default else "ℹ️"
         print(f"{status} {var}: {value}")
 
@@ -96,23 +102,20 @@ def check_env_variables():
     print("-" * 30)
 
     # Check for security issues
-    secret_key = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
-    if secret_key == "your-secret-key-change-this-in-production":
+    def is_default(var):
+        return values[var] == required_vars[var]["default"]
+
+    if is_default("SECRET_KEY"):
         issues.append("❌ SECRET_KEY is using default value - CHANGE THIS!")
 
-    mail_password = os.getenv("MAIL_PASSWORD", "your-app-password")
-    if mail_password == "your-app-password":
+    if is_default("MAIL_PASSWORD"):
         issues.append("❌ MAIL_PASSWORD is using default value")
 
-    admin_password = os.getenv("ADMIN_PASSWORD", "admin123")
-    if admin_password == "admin123":
+    if is_default("ADMIN_PASSWORD"):
         warnings.append("⚠️ ADMIN_PASSWORD is using default value")
 
     # Check email configuration
-    mail_username = os.getenv("MAIL_USERNAME", "your-email@gmail.com")
-    mail_from = os.getenv("MAIL_FROM", "your-email@gmail.com")
-
-    if mail_username == "your-email@gmail.com" or mail_from == "your-email@gmail.com":
+    if is_default("MAIL_USERNAME") or is_default("MAIL_FROM"):
         warnings.append("⚠️ Email configuration is using default values")
 
     # Summary
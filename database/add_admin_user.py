@@ -1,6 +1,9 @@
+import csv
 import getpass
+import io
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 import bcrypt
 import psycopg2
@@ -21,11 +24,16 @@ def get_conn():
     return psycopg2.connect(DB_URL, cursor_factory=RealDictCursor)
 
 
+def hash_password(password):
+    rounds = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+
 def create_admin():
     username = input("Enter admin username: ").strip()
     email = input("Enter admin email: ").strip()
     password = getpass.getpass("Enter admin password: ").strip()
-    hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    hashed = hash_password(password)
     with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute(
@@ -40,6 +48,49 @@ def create_admin():
     print(f"Admin user '{username}' created (or already exists).")
 
 
+def bulk_create_admins(csv_path):
+    # CSV columns: username,email,password (no header)
+    with open(csv_path, newline="") as f:
+        rows = [
+            [field.strip() for field in row] for row in csv.reader(f) if row
+        ]
+    # bcrypt releases the GIL, so hashing spreads across threads
+    with ThreadPoolExecutor() as pool:
+        hashes = list(pool.map(hash_password, (row[2] for row in rows)))
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for (username, email, _), hashed in zip(rows, hashes):
+        writer.writerow((username, email, hashed))
+    buffer.seek(0)
+
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            # COPY into a staging table, then one INSERT that skips existing users
+            cur.execute(
+                """
+                CREATE TEMP TABLE admin_import (
+                    username VARCHAR(50), email VARCHAR(255), hashed_password VARCHAR(255)
+                ) ON COMMIT DROP
+            """
+            )
+            cur.copy_expert(
+                "COPY admin_import (username, email, hashed_password) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+            cur.execute(
+                """
+                INSERT INTO users (username, email, hashed_password, is_active, is_admin, status, created_at, updated_at)
+                SELECT username, email, hashed_password, TRUE, TRUE, 'approved', NOW(), NOW()
+                FROM admin_import
+                ON CONFLICT DO NOTHING
+            """
+            )
+            created = cur.rowcount
+            conn.commit()
+    print(f"{created} of {len(rows)} admin users created.")
+
+
 def list_admins():
     with get_conn() as conn:
         with conn.cursor() as cur:
@@ -73,7 +124,7 @@ def remove_admin():
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: add_admin_user.py [create|list|remove]")
+        print("Usage: add_admin_user.py [create|list|remove|bulk <csv>]")
         sys.exit(1)
     cmd = sys.argv[1]
     if cmd == "create":
@@ -82,6 +133,8 @@ def main():
         list_admins()
     elif cmd == "remove":
         remove_admin()
+    elif cmd == "bulk" and len(sys.argv) == 3:
+        bulk_create_admins(sys.argv[2])
     else:
         print(f"Unknown command: {cmd}")
         sys.exit(1)
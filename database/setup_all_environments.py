@@ -17,8 +17,8 @@ import asyncio
 from datetime import datetime
 from pathlib import Path
 
+import bcrypt
 from dotenv import load_dotenv
-from passlib.context import CryptContext
 from sqlalchemy import create_engine, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
@@ -57,6 +57,123 @@ def to_sync_url(db_url):
     return db_url.replace("postgresql+asyncpg://", "postgresql+psycopg2://")
 
 
+async def migrate_refresh_tokens(async_engine):
+    async with async_engine.begin() as conn:
+        # refresh_tokens: plaintext token -> SHA-256 token_hash primary key
+        await conn.execute(
+            text(
+                """
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'refresh_tokens' AND column_name = 'token'
+            ) THEN
+                ALTER TABLE refresh_tokens ADD COLUMN IF NOT EXISTS token_hash BYTEA;
+                UPDATE refresh_tokens
+                    SET token_hash = sha256(convert_to(token, 'UTF8'))
+                    WHERE token_hash IS NULL;
+                ALTER TABLE refresh_tokens DROP CONSTRAINT IF EXISTS refresh_tokens_pkey;
+                ALTER TABLE refresh_tokens DROP COLUMN token;
+                ALTER TABLE refresh_tokens ADD PRIMARY KEY (token_hash);
+            END IF;
+        END$$;
+        """
+            )
+        )
+        print("✅ Ensured refresh_tokens are keyed by token_hash")
+
+        # refresh_tokens: index for the periodic expired-token purge
+        await conn.execute(
+            text(
+                """
+        CREATE INDEX IF NOT EXISTS ix_refresh_tokens_expires_at
+        ON refresh_tokens (expires_at);
+        """
+            )
+        )
+        print("✅ Ensured ix_refresh_tokens_expires_at index on refresh_tokens table")
+
+
+async def migrate_images(async_engine):
+    async with async_engine.begin() as conn:
+        # images: composite index for per-user listings ordered by date
+        await conn.execute(
+            text(
+                """
+        CREATE INDEX IF NOT EXISTS ix_images_username_upload_date
+        ON images (username, upload_date DESC);
+        """
+            )
+        )
+        print("✅ Ensured ix_images_username_upload_date index on images table")
+
+
+async def migrate_posters(async_engine):
+    async with async_engine.begin() as conn:
+        # posters: partial indexes for a user's live posts and trash
+        await conn.execute(
+            text(
+                """
+        CREATE INDEX IF NOT EXISTS ix_posters_username_active
+        ON posters (username) WHERE is_deleted IS FALSE;
+        """
+            )
+        )
+        await conn.execute(
+            text(
+                """
+        CREATE INDEX IF NOT EXISTS ix_posters_username_deleted
+        ON posters (username) WHERE is_deleted IS TRUE;
+        """
+            )
+        )
+        print("✅ Ensured partial username indexes on posters table")
+
+
+async def migrate_archived_posters(async_engine):
+    async with async_engine.begin() as conn:
+        # archived_posters: original_id index becomes unique
+        result = await conn.execute(
+            text(
+                """
+        SELECT 1 FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = 'ix_archived_posters_original_id' AND i.indisunique;
+        """
+            )
+        )
+        if result.first() is None:
+            await conn.execute(
+                text("DROP INDEX IF EXISTS ix_archived_posters_original_id;")
+            )
+            # The old archive path could archive a poster twice; keep the
+            # first archive of each poster so the unique index can be built
+            result = await conn.execute(
+                text(
+                    """
+            DELETE FROM archived_posters a
+            USING archived_posters b
+            WHERE a.original_id = b.original_id AND a.id > b.id;
+            """
+                )
+            )
+            if result.rowcount:
+                print(
+                    f"⚠️ Removed {result.rowcount} duplicate archived_posters rows "
+                    "(kept the oldest per original_id)"
+                )
+            await conn.execute(
+                text(
+                    """
+            CREATE UNIQUE INDEX ix_archived_posters_original_id
+            ON archived_posters (original_id);
+            """
+                )
+            )
+        print("✅ Ensured unique ix_archived_posters_original_id index")
+
+
 async def create_tables_and_migrations(async_engine):
     # Tạo bảng dựa trên SQLAlchemy models (Base.metadata)
     async with async_engine.begin() as conn:
@@ -87,34 +204,48 @@ async def create_tables_and_migrations(async_engine):
         )
         print("✅ Ensured privacy column on albums table")
 
-        # 2. Các migration bổ sung khác nếu cần (ví dụ: soft delete, FK, ...)
-        # ...
+    # Các migration còn lại độc lập theo bảng: mỗi bảng chạy trên một
+    # connection/transaction riêng để các index lớn được build song song
+    await asyncio.gather(
+        migrate_refresh_tokens(async_engine),
+        migrate_images(async_engine),
+        migrate_posters(async_engine),
+        migrate_archived_posters(async_engine),
+    )
+
+    # 2. Các migration bổ sung khác nếu cần (ví dụ: soft delete, FK, ...)
+    # ...
+
+
+async def hash_password(password):
+    # bcrypt is CPU-bound, keep it off the event loop
+    rounds = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    hashed = await asyncio.to_thread(
+        bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt(rounds)
+    )
+    return hashed.decode("utf-8")
 
 
 async def create_admin_user(async_engine):
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
     async_session = sessionmaker(
         async_engine, class_=AsyncSession, expire_on_commit=False
     )
     async with async_session() as session:
         user_repo = PostgreSQLUserRepository(session)
         admin_username, admin_email, admin_password = get_admin_info()
-        existing_user = await user_repo.get_by_username(admin_username)
-        if existing_user:
-            print(f"ℹ️ Admin user '{admin_username}' already exists")
-            return
         admin_user = User(
             username=admin_username,
             email=admin_email,
-            hashed_password=pwd_context.hash(admin_password),
+            hashed_password=await hash_password(admin_password),
             is_active=True,
             is_admin=True,
             status=UserStatus.APPROVED,
             approved_at=datetime.utcnow(),
             approved_by="system",
         )
-        await user_repo.create(admin_user)
-        await session.commit()
+        if not await user_repo.create_if_absent(admin_user):
+            print(f"ℹ️ Admin user '{admin_username}' already exists")
+            return
         print(f"👤 Created admin user: {admin_username}/{admin_password}")
 
 
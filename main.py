@@ -2,6 +2,8 @@
 Main application entry point using Clean Architecture with PostgreSQL
 """
 
+import asyncio
+import contextlib
 import os
 import time
 from contextlib import asynccontextmanager
@@ -9,7 +11,7 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 # Log all requests
 from starlette.middleware.base import BaseHTTPMiddleware
@@ -20,6 +22,7 @@ from app.api.routes import router
 from app.config import settings
 from app.exceptions import setup_exception_handlers
 from app.infrastructure.database import close_db, init_db
+from app.infrastructure.maintenance import purge_expired_tokens_periodically
 from app.infrastructure.notifier import post_notifier
 from app.utils.logging import get_logger, setup_logging
 
@@ -39,11 +42,15 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 Starting Image Upload Server with PostgreSQL...")
     await init_db()
     logger.info("✅ Database initialized successfully")
+    token_cleanup = asyncio.create_task(purge_expired_tokens_periodically())
 
     yield
 
     # Shutdown
     logger.info("🛑 Shutting down server...")
+    token_cleanup.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await token_cleanup
     await close_db()
     logger.info("✅ Database connections closed")
 
@@ -154,6 +161,7 @@ open http://localhost:8000/docs
         },
     ],
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Setup exception handlers
@@ -2,11 +2,22 @@
 Unit tests for authentication service
 """
 
-from unittest.mock import AsyncMock
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+from fastapi import HTTPException, Request, Response
+from jose import jwt
 
+from app.api.routes.auth import login as login_routes
+from app.core.entities import AdminApprovalRequest, User, UserStatus
+from app.core.services import auth_service as auth_service_module
 from app.core.services.auth_service import AuthService
+from app.infrastructure.repositories import PostgreSQLRefreshTokenRepository
 
 
 class TestAuthService:
@@ -59,7 +70,134 @@ class TestAuthService:
         verified_username = auth_service.verify_token(token)
         assert verified_username == username
 
+    def test_tokens_decode_with_jose(self, auth_service):
+        """Test hand-encoded tokens are standard HS256 JWTs."""
+        token = auth_service._create_refresh_token("test\"user", is_admin=True)
+        payload = jwt.decode(token, "test_secret_key", algorithms=["HS256"])
+        assert jwt.get_unverified_header(token) == {"alg": "HS256", "typ": "JWT"}
+        assert payload["sub"] == "test\"user"
+        assert payload["is_admin"] is True
+        assert payload["type"] == "refresh"
+        assert payload["exp"] > time.time() + 6 * 86400
+
     def test_verify_token_invalid(self, auth_service):
         """Test invalid token verification."""
         with pytest.raises(Exception):
             auth_service.verify_token("invalid_token")
+
+    @pytest.mark.asyncio
+    async def test_logout_deletes_token_by_hash(self, auth_service, mock_token_repo):
+        """Test refresh tokens are looked up by SHA-256 digest, not plain text."""
+        token = auth_service._create_refresh_token("testuser")
+        await auth_service.logout_user(token, "testuser")
+        mock_token_repo.delete_by_hash.assert_awaited_once_with(
+            hashlib.sha256(token.encode("utf-8")).digest()
+        )
+
+    @pytest.mark.asyncio
+    async def test_get_pending_users_is_cached(self, auth_service, mock_user_repo):
+        """Test repeated pending-user polls hit the repository once."""
+        auth_service_module._pending_users_cache.clear()
+        mock_user_repo.get_by_status.return_value = [
+            User(
+                username="pending_user",
+                email="pending@example.com",
+                hashed_password="x",
+                status=UserStatus.PENDING,
+            )
+        ]
+        first = await auth_service.get_pending_users()
+        second = await auth_service.get_pending_users()
+        assert first == second
+        assert [u.username for u in first] == ["pending_user"]
+        mock_user_repo.get_by_status.assert_awaited_once()
+        auth_service_module._pending_users_cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_approve_user_survives_email_failure(
+        self, auth_service, mock_user_repo, mock_email_service
+    ):
+        """Test approval is persisted even if the background email fails."""
+        mock_user_repo.get_by_username.return_value = User(
+            username="pending_user",
+            email="pending@example.com",
+            hashed_password="x",
+            status=UserStatus.PENDING,
+        )
+        mock_email_service.send_approval_notification.side_effect = RuntimeError
+        result = await auth_service.approve_user(
+            AdminApprovalRequest(
+                username="pending_user", action="approve", admin_username="admin"
+            )
+        )
+        await asyncio.gather(*auth_service_module._background_tasks)
+        assert result == {"message": "User pending_user approved successfully"}
+        mock_user_repo.update.assert_awaited_once()
+        mock_email_service.send_approval_notification.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_refresh_rejects_token_stored_for_other_user(
+        self, auth_service, mock_token_repo
+    ):
+        """Test a refresh token is only accepted for the user it was issued to."""
+        token = auth_service._create_refresh_token("testuser")
+        mock_token_repo.get_by_hash.return_value = SimpleNamespace(
+            username="someone_else", expires_at=datetime.now(timezone.utc)
+        )
+        with pytest.raises(ValueError, match="Invalid refresh token"):
+            await auth_service.refresh_access_token(token)
+
+    @pytest.mark.asyncio
+    async def test_refresh_rejects_token_already_rotated(
+        self, auth_service, mock_user_repo, mock_token_repo
+    ):
+        """Test a refresh token can only be rotated once."""
+        token = auth_service._create_refresh_token("testuser")
+        mock_token_repo.get_by_hash.return_value = SimpleNamespace(
+            username="testuser", expires_at=datetime(2999, 1, 1, tzinfo=timezone.utc)
+        )
+        mock_user_repo.get_by_username.return_value = User(
+            username="testuser",
+            email="test@example.com",
+            hashed_password="x",
+            status=UserStatus.APPROVED,
+        )
+        mock_token_repo.rotate.return_value = False
+        with pytest.raises(ValueError, match="Invalid refresh token"):
+            await auth_service.refresh_access_token(token)
+        mock_token_repo.rotate.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_refresh_route_commits_expired_token_delete(
+        self, mock_user_repo, mock_email_service
+    ):
+        """Test an expired refresh token is removed even though refresh fails."""
+        session = AsyncMock(info={})
+        session.execute.return_value = MagicMock(rowcount=1)
+        session.execute.return_value.scalar_one_or_none.return_value = (
+            SimpleNamespace(
+                username="testuser",
+                expires_at=datetime(2000, 1, 1, tzinfo=timezone.utc),
+            )
+        )
+        auth_service = AuthService(
+            mock_user_repo,
+            PostgreSQLRefreshTokenRepository(session),
+            mock_email_service,
+            "test_secret_key",
+            "admin@test.com",
+        )
+        token = auth_service._create_refresh_token("testuser")
+        request = Request(
+            {
+                "type": "http",
+                "headers": [(b"authorization", f"Bearer {token}".encode())],
+            }
+        )
+        with pytest.raises(HTTPException) as exc_info:
+            await login_routes.refresh_token(request, Response(), auth_service)
+        assert exc_info.value.detail == "Refresh token expired"
+        delete_stmt = session.execute.await_args_list[-1].args[0]
+        assert delete_stmt.is_delete
+        session.commit.assert_awaited_once()
+        session.rollback.assert_not_awaited()
@@ -0,0 +1,57 @@
+"""
+Unit tests for database session helpers
+"""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.infrastructure.database import (after_commit, commit_or_flush,
+                                         unit_of_work)
+
+
+class TestUnitOfWork:
+    """Test request-scoped unit of work."""
+
+    @pytest.mark.asyncio
+    async def test_writes_commit_once_on_exit(self):
+        """Test repository writes only flush inside a unit of work."""
+        session = AsyncMock(info={})
+        async with unit_of_work(session):
+            await commit_or_flush(session)
+            async with unit_of_work(session):
+                await commit_or_flush(session)
+            session.commit.assert_not_awaited()
+        session.commit.assert_awaited_once()
+        assert session.flush.await_count == 2
+
+        await commit_or_flush(session)
+        assert session.commit.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_rolls_back_on_error(self):
+        """Test an exception rolls back every write in the block."""
+        session = AsyncMock(info={})
+        with pytest.raises(ValueError):
+            async with unit_of_work(session):
+                await commit_or_flush(session)
+                raise ValueError("boom")
+        session.rollback.assert_awaited_once()
+        session.commit.assert_not_awaited()
+        assert session.info == {}
+
+    @pytest.mark.asyncio
+    async def test_after_commit_callbacks_wait_for_commit(self):
+        """Test callbacks run after the block commits and never on rollback."""
+        session = AsyncMock(info={})
+        calls = []
+        async with unit_of_work(session):
+            after_commit(session, lambda: calls.append("committed"))
+            assert calls == []
+        assert calls == ["committed"]
+
+        with pytest.raises(ValueError):
+            async with unit_of_work(session):
+                after_commit(session, lambda: calls.append("rolled back"))
+                raise ValueError("boom")
+        assert calls == ["committed"]
@@ -0,0 +1,175 @@
+"""
+Unit tests for image service
+"""
+
+import shutil
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core.entities import Image
+from app.core.services import image_service as image_service_module
+from app.core.services.image_service import ImageService
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+class TestImageService:
+    """Test image service."""
+
+    @pytest.fixture
+    def mock_image_repo(self):
+        """Mock image repository."""
+        repo = AsyncMock()
+        repo.create.side_effect = lambda image: image
+        return repo
+
+    @pytest.fixture
+    def image_service(self, mock_image_repo, tmp_path):
+        """Create image service with a small size limit."""
+        return ImageService(
+            image_repo=mock_image_repo,
+            file_storage=AsyncMock(),
+            upload_dir=str(tmp_path),
+            max_file_size=16,
+        )
+
+    @pytest.mark.asyncio
+    async def test_upload_rejects_oversized_stream(
+        self, image_service, mock_image_repo, tmp_path
+    ):
+        """Test oversized uploads are rejected while streaming."""
+        with pytest.raises(ValueError, match="exceeds maximum"):
+            await image_service.upload_image(
+                username="testuser",
+                file_chunks=_chunks(b"\xff\xd8\xff" + b"0" * 10, b"0" * 10),
+                content_type="image/jpeg",
+                original_filename="photo.jpg",
+            )
+        mock_image_repo.create.assert_not_awaited()
+        # The partially written file is cleaned up
+        assert not [p for p in tmp_path.rglob("*") if p.is_file()]
+
+    @pytest.mark.asyncio
+    async def test_upload_counts_streamed_bytes(self, image_service):
+        """Test file size is taken from the streamed content."""
+        image = await image_service.upload_image(
+            username="testuser",
+            file_chunks=_chunks(b"\xff\xd8\xff", b"0" * 5),
+            content_type="image/jpeg",
+            original_filename="photo.jpg",
+        )
+        assert image.file_size == 8
+        with open(image.file_path, "rb") as f:
+            assert f.read() == b"\xff\xd8\xff00000"
+
+    @pytest.mark.asyncio
+    async def test_upload_sniffs_content_type(self, image_service):
+        """Test the stored content type comes from the file's magic bytes."""
+        image = await image_service.upload_image(
+            username="testuser",
+            file_chunks=_chunks(b"\x89PNG", b"\r\n\x1a\n0000"),
+            content_type="image/png",
+            original_filename="photo.png",
+        )
+        assert image.content_type == "image/png"
+
+    @pytest.mark.asyncio
+    async def test_upload_rejects_non_image_bytes(self, image_service):
+        """Test files without a known image signature are rejected."""
+        with pytest.raises(ValueError, match="must be an image"):
+            await image_service.upload_image(
+                username="testuser",
+                file_chunks=_chunks(b"<html>not an image</html>"),
+                content_type="image/jpeg",
+                original_filename="photo.jpg",
+            )
+
+    def test_generate_filename_is_unique_and_normalised(self, image_service):
+        """Test generated filenames never collide and keep a safe extension."""
+        first = image_service._generate_filename("testuser", "Photo.PNG")
+        second = image_service._generate_filename("testuser", "Photo.PNG")
+        assert first != second
+        assert first.startswith("testuser_") and first.endswith(".png")
+        assert image_service._generate_filename("testuser", "noext").endswith(".jpg")
+
+    @pytest.mark.asyncio
+    async def test_upload_rejects_declared_type_mismatch(
+        self, image_service, tmp_path
+    ):
+        """Test a PNG body declared as JPEG is rejected before touching disk."""
+        with pytest.raises(ValueError, match="does not match"):
+            await image_service.upload_image(
+                username="testuser",
+                file_chunks=_chunks(b"\x89PNG\r\n\x1a\n0000"),
+                content_type="image/jpeg",
+                original_filename="photo.jpg",
+            )
+        assert not list(tmp_path.iterdir())
+
+    @pytest.mark.asyncio
+    async def test_upload_recreates_removed_directory(self, image_service, tmp_path):
+        """Test an upload succeeds after its cached directory was removed."""
+        await image_service.upload_image(
+            username="testuser",
+            file_chunks=_chunks(b"\xff\xd8\xff0"),
+            content_type="image/jpeg",
+            original_filename="photo.jpg",
+        )
+        for child in tmp_path.iterdir():
+            shutil.rmtree(child)
+
+        image = await image_service.upload_image(
+            username="testuser",
+            file_chunks=_chunks(b"\xff\xd8\xff", b"1"),
+            content_type="image/jpeg",
+            original_filename="photo.jpg",
+        )
+        with open(image.file_path, "rb") as f:
+            assert f.read() == b"\xff\xd8\xff1"
+
+    @pytest.mark.asyncio
+    async def test_user_images_cached_until_upload(
+        self, image_service, mock_image_repo
+    ):
+        """Test listings are cached and dropped when the user uploads."""
+        image_service_module.invalidate_user_images("cacheuser")
+        mock_image_repo.get_by_username.return_value = []
+        await image_service.get_user_images("cacheuser")
+        await image_service.get_user_images("cacheuser")
+        mock_image_repo.get_by_username.assert_awaited_once()
+
+        await image_service.upload_image(
+            username="cacheuser",
+            file_chunks=_chunks(b"\xff\xd8\xff0"),
+            content_type="image/jpeg",
+            original_filename="photo.jpg",
+        )
+        await image_service.get_user_images("cacheuser")
+        assert mock_image_repo.get_by_username.await_count == 2
+        image_service_module.invalidate_user_images("cacheuser")
+
+    @pytest.mark.asyncio
+    async def test_iter_user_images_streams_public_paths(
+        self, image_service, mock_image_repo
+    ):
+        """Test streamed listings carry the same fields as the buffered one."""
+
+        async def _images(username):
+            yield Image(
+                filename="a.jpg",
+                original_filename="a.jpg",
+                username=username,
+                file_path="uploads/2024/01/01/testuser/a.jpg",
+                file_size=3,
+                content_type="image/jpeg",
+            )
+
+        mock_image_repo.iter_by_username = _images
+        rows = [row async for row in image_service.iter_user_images("testuser")]
+        assert [row["file_path"] for row in rows] == [
+            "/uploads/2024/01/01/testuser/a.jpg"
+        ]
@@ -0,0 +1,30 @@
+"""
+Unit tests for the new-post notifier
+"""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.infrastructure.notifier import PostNotifier
+
+
+class TestPostNotifier:
+    """Test post notifier."""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_skips_poster_and_drops_failed_sockets(self):
+        """Test the poster is not notified and broken sockets are removed."""
+        notifier = PostNotifier()
+        poster, viewer, broken = AsyncMock(), AsyncMock(), AsyncMock()
+        broken.send_json.side_effect = RuntimeError("connection closed")
+        await notifier.connect(poster, "alice")
+        await notifier.connect(viewer, "bob")
+        await notifier.connect(broken, "carol")
+
+        await notifier.broadcast_new_post("alice")
+
+        poster.send_json.assert_not_awaited()
+        viewer.send_json.assert_awaited_once_with({"event": "new_post"})
+        assert broken not in notifier.usernames
+        assert viewer in notifier.usernames
@@ -0,0 +1,85 @@
+"""
+Unit tests for poster service
+"""
+
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core.services.poster_service import PosterService
+
+
+class TestPosterService:
+    """Test poster service."""
+
+    @pytest.fixture
+    def mock_poster_repo(self):
+        """Mock poster repository."""
+        return AsyncMock()
+
+    @pytest.fixture
+    def mock_image_repo(self):
+        """Mock image repository."""
+        return AsyncMock()
+
+    @pytest.fixture
+    def mock_file_storage(self):
+        """Mock file storage."""
+        return AsyncMock()
+
+    @pytest.fixture
+    def poster_service(self, mock_poster_repo, mock_image_repo, mock_file_storage):
+        """Create poster service with mocked dependencies."""
+        return PosterService(
+            poster_repo=mock_poster_repo,
+            archived_repo=AsyncMock(),
+            image_repo=mock_image_repo,
+            file_storage=mock_file_storage,
+        )
+
+    @pytest.mark.asyncio
+    async def test_empty_trash_removes_image_files(
+        self, poster_service, mock_poster_repo, mock_image_repo, mock_file_storage
+    ):
+        """Test emptying the trash deletes the archived posters' images."""
+        mock_poster_repo.archive_and_hard_delete_all_deleted.return_value = [1, 2]
+        mock_image_repo.delete_by_poster_ids.return_value = ["a.jpg", "b.jpg"]
+
+        count = await poster_service.hard_delete_all_deleted("testuser")
+
+        assert count == 2
+        mock_poster_repo.get_deleted.assert_not_awaited()
+        mock_image_repo.delete_by_poster_ids.assert_awaited_once_with([1, 2])
+        calls = mock_file_storage.delete_file.await_args_list
+        assert {call.args[0] for call in calls} == {"a.jpg", "b.jpg"}
+
+    @pytest.mark.asyncio
+    async def test_hard_delete_removes_files_after_commit(
+        self, mock_poster_repo, mock_image_repo, mock_file_storage
+    ):
+        """Test image files are only removed once the transaction commits."""
+        events = []
+
+        @asynccontextmanager
+        async def transaction():
+            yield
+            events.append("commit")
+
+        mock_poster_repo.get_by_id.return_value = SimpleNamespace(
+            username="testuser", is_deleted=True
+        )
+        mock_image_repo.delete_by_poster_ids.return_value = ["a.jpg"]
+        mock_file_storage.delete_file.side_effect = lambda path: events.append(path)
+        service = PosterService(
+            poster_repo=mock_poster_repo,
+            archived_repo=AsyncMock(),
+            image_repo=mock_image_repo,
+            file_storage=mock_file_storage,
+            transaction=transaction,
+        )
+
+        await service.hard_delete_post(1, "testuser")
+
+        assert events == ["commit", "a.jpg"]
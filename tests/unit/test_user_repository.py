@@ -0,0 +1,91 @@
+"""
+Unit tests for user repository
+"""
+
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.entities import User
+from app.infrastructure.models import UserModel
+from app.infrastructure.repositories import user_repository as user_repository_module
+from app.infrastructure.repositories.user_repository import PostgreSQLUserRepository
+
+
+class TestUserRepository:
+    """Test user repository."""
+
+    @pytest.mark.asyncio
+    async def test_lookups_cached_until_update(self):
+        """Test lookups hit the database once and updates drop the entry."""
+        user_repository_module._invalidate_user("cacheuser", "cache@example.com")
+        row = {
+            "username": "cacheuser",
+            "email": "cache@example.com",
+            "hashed_password": "hash",
+            "is_active": True,
+            "is_admin": False,
+            "status": "approved",
+            "created_at": datetime(2024, 1, 1),
+            "updated_at": datetime(2024, 1, 1),
+            "approved_at": None,
+            "approved_by": None,
+        }
+        result = MagicMock()
+        result.mappings.return_value.one_or_none.return_value = row
+        result.scalar_one_or_none.return_value = UserModel(**row)
+        session = AsyncMock(info={})
+        session.execute.return_value = result
+        repo = PostgreSQLUserRepository(session)
+
+        user = await repo.get_by_username("cacheuser")
+        user.is_admin = True
+        assert (await repo.get_by_email("cache@example.com")).is_admin is False
+        assert session.execute.await_count == 1
+
+        await repo.update(User(**user.model_dump()))
+        await repo.get_by_username("cacheuser")
+        assert session.execute.await_count == 3
+        user_repository_module._invalidate_user("cacheuser")
+
+    @pytest.mark.asyncio
+    async def test_create_if_absent_returns_none_on_conflict(self):
+        """Test a taken username or email yields None instead of raising."""
+        result = MagicMock()
+        result.scalar_one_or_none.return_value = None
+        session = AsyncMock(info={})
+        session.execute.return_value = result
+        repo = PostgreSQLUserRepository(session)
+
+        user = User(username="taken", email="taken@example.com", hashed_password="x")
+        assert await repo.create_if_absent(user) is None
+        session.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_loads_never_overlap_for_a_key(self):
+        """Test late callers queue on the same lock while others still wait."""
+        active, overlaps = 0, []
+
+        async def load():
+            nonlocal active
+            active += 1
+            overlaps.append(active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return None  # misses are not cached, so every caller loads
+
+        async def late_caller():
+            await asyncio.sleep(0.015)
+            return await user_repository_module._cached_user("username:ghost", load)
+
+        await asyncio.gather(
+            *(
+                user_repository_module._cached_user("username:ghost", load)
+                for _ in range(3)
+            ),
+            late_caller(),
+        )
+        assert max(overlaps) == 1
+        assert "username:ghost" not in user_repository_module._user_locks